@@ -1,3 +1,4 @@
+from django.db.models import Max
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
@@ -9,6 +10,8 @@ def admin_notif_dashboard(request):
     return render(request, 'admin_notif/admin_notif.html', {
         'role': 'admin',
         'notifications': notifications,
+        # Where the page's long poll for newer notifications starts from.
+        'latest_notification_id': Notification.objects.aggregate(latest=Max('id'))['latest'],
     })
 
 
@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'aktivklass.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up, as it loads models.
+from chat_screen.realtime import chat_socket  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """Serve chat WebSockets next to the regular Django HTTP application."""
+    if scope['type'] == 'websocket':
+        return await chat_socket(scope, receive, send)
+    return await django_application(scope, receive, send)
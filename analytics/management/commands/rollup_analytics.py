@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics.rollups import rollup_day
+
+
+class Command(BaseCommand):
+    help = 'Write the daily analytics rollups (yesterday by default); safe to rerun for a day'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to roll up, as YYYY-MM-DD')
+        parser.add_argument('--days', type=int, default=1, help='Number of days to roll up, ending on --date')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                end = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"Invalid date {options['date']!r}, expected YYYY-MM-DD")
+        else:
+            end = timezone.localdate() - timedelta(days=1)
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+
+        rows = 0
+        for offset in range(options['days'] - 1, -1, -1):
+            rows += rollup_day(end - timedelta(days=offset))
+
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {options['days']} day(s) ending {end} into {rows} rows"))
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Q, Sum, Value, When
+
+from core.models import AnalyticsRollup, Attendance, ClassJoinRequest, Enrollment, QuizGrade
+
+BATCH_SIZE = 500
+
+# Date-range queries are capped so one request cannot read years of rows.
+MAX_RANGE_DAYS = 366
+
+# Grade buckets by QuizGrade.percentage, matching its letter grades.
+GRADE_BUCKETS = [(90, 'A'), (80, 'B'), (70, 'C'), (60, 'D')]
+
+
+def grade_bucket():
+    return Case(
+        *[When(percentage__gte=floor, then=Value(letter)) for floor, letter in GRADE_BUCKETS],
+        default=Value('F'),
+        output_field=CharField(),
+    )
+
+
+def collect_facts(day):
+    """
+    The ``(metric, class_id, dimension, value)`` facts of ``day``, from one
+    grouped query per metric:
+
+    - enrollments: ``new`` that day and the ``total`` at its end, per class
+    - attendance: Present/Absent/Late per class
+    - join_requests: requests made that day per class, by their current status
+    - grades: quiz grades given that day per class, by letter bucket
+    """
+    facts = []
+
+    enrollments = Enrollment.objects.filter(date_enrolled__date__lte=day).values('enrolled_class_id').annotate(
+        total=Count('id'),
+        new=Count('id', filter=Q(date_enrolled__date=day)),
+    ).order_by()
+    for row in enrollments:
+        facts.append(('enrollments', row['enrolled_class_id'], 'total', row['total']))
+        if row['new']:
+            facts.append(('enrollments', row['enrolled_class_id'], 'new', row['new']))
+
+    attendance = Attendance.objects.filter(date=day).values('class_obj_id', 'status').annotate(count=Count('id')).order_by()
+    facts.extend(('attendance', row['class_obj_id'], row['status'], row['count']) for row in attendance)
+
+    join_requests = ClassJoinRequest.objects.filter(requested_at__date=day).values(
+        'class_requested_id', 'status',
+    ).annotate(count=Count('id')).order_by()
+    facts.extend(('join_requests', row['class_requested_id'], row['status'], row['count']) for row in join_requests)
+
+    grades = QuizGrade.objects.filter(graded_at__date=day).annotate(bucket=grade_bucket()).values(
+        'quiz__class_obj_id', 'bucket',
+    ).annotate(count=Count('id')).order_by()
+    facts.extend(('grades', row['quiz__class_obj_id'], row['bucket'], row['count']) for row in grades)
+
+    return facts
+
+
+def rollup_day(day):
+    """
+    Replace the rollup rows of ``day`` with freshly collected facts, so
+    running it again for the same day leaves one set of rows. Returns the
+    number of rows written.
+    """
+    rows = [
+        AnalyticsRollup(date=day, metric=metric, class_obj_id=class_id, dimension=dimension, value=value)
+        for metric, class_id, dimension, value in collect_facts(day)
+    ]
+    with transaction.atomic():
+        AnalyticsRollup.objects.filter(date=day).delete()
+        AnalyticsRollup.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def date_range(start, end):
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def get_series(metric, start, end, class_id=None):
+    """
+    Daily values of ``metric`` from ``start`` to ``end`` (inclusive), summed
+    over classes unless ``class_id`` is given, as ``{'dates', 'series'}``
+    where ``series`` maps each dimension to one value per date. Reads the
+    rollup table only.
+    """
+    rollups = AnalyticsRollup.objects.filter(metric=metric, date__range=(start, end))
+    if class_id is not None:
+        rollups = rollups.filter(class_obj_id=class_id)
+
+    dates = date_range(start, end)
+    position = {day: i for i, day in enumerate(dates)}
+    series = {}
+    for row in rollups.values('date', 'dimension').annotate(value=Sum('value')).order_by('dimension', 'date'):
+        series.setdefault(row['dimension'], [0] * len(dates))[position[row['date']]] = row['value']
+    return {'dates': [day.isoformat() for day in dates], 'series': series}
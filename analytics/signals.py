@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from analytics.snapshot import bump_version
+from core.models import Faculty, Student
+
+
+@receiver(post_save, sender=Faculty)
+@receiver(post_delete, sender=Faculty)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def expire_analytics_snapshot(sender, **kwargs):
+    transaction.on_commit(bump_version)
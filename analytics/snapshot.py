@@ -0,0 +1,89 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from core.models import Faculty, Student
+
+CHART_COLORS = ['#10B981', '#059669', '#047857', '#065F46', '#064E3B', '#022C22']
+
+# Snapshots are keyed by a version that Faculty/Student signals bump, so a
+# stale one is never read; the timeout only evicts old versions.
+SNAPSHOT_TIMEOUT = 60 * 60
+VERSION_KEY = 'analytics.snapshot.version'
+
+
+def chart_series(counts, label=str):
+    """``counts`` ({label: count}, in display order) as pie chart data."""
+    labels = [label(key) for key in counts]
+    return {
+        'labels': labels,
+        'data': list(counts.values()),
+        'colors': [CHART_COLORS[i % len(CHART_COLORS)] for i in range(len(labels))],
+    }
+
+
+def count_by(rows, field):
+    counts = {}
+    for row in rows:
+        if row[field]:
+            counts[row[field]] = counts.get(row[field], 0) + row['count']
+    return dict(sorted(counts.items()))
+
+
+def build_snapshot():
+    """
+    Every analytics figure and chart series, from two grouped queries: one
+    over faculty by (status, college) and one over students by (course,
+    year). Blank courses and years are left out of their breakdowns.
+    """
+    faculty_rows = list(Faculty.objects.values('status', 'college_name').annotate(count=Count('faculty_id')).order_by())
+    student_rows = list(Student.objects.values('course', 'year').annotate(count=Count('id')).order_by())
+
+    faculty_by_status = count_by(faculty_rows, 'status')
+    faculty_by_college = count_by(faculty_rows, 'college_name')
+    students_by_course = count_by(student_rows, 'course')
+    students_by_year = count_by(student_rows, 'year')
+
+    return {
+        'total_faculty': sum(row['count'] for row in faculty_rows),
+        'total_students': sum(row['count'] for row in student_rows),
+        'active_faculty': faculty_by_status.get('ACTIVE', 0),
+        'faculty_by_status': faculty_by_status,
+        'faculty_by_college': faculty_by_college,
+        'students_by_course': students_by_course,
+        'students_by_year': students_by_year,
+        'charts': {
+            'account_status': chart_series({
+                'Active': faculty_by_status.get('ACTIVE', 0),
+                'Disabled': faculty_by_status.get('DISABLED', 0),
+            }),
+            'faculty_college': chart_series(faculty_by_college),
+            'student_course': chart_series(students_by_course),
+            'student_year': chart_series(students_by_year, label=lambda year: f'Year {year}'),
+        },
+    }
+
+
+def get_version():
+    # Seeded from the clock so a version key lost to eviction never comes
+    # back as a number an older snapshot is still cached under.
+    cache.add(VERSION_KEY, time.time_ns(), None)
+    return cache.get(VERSION_KEY)
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_version()
+
+
+def get_snapshot():
+    """The cached snapshot for the current version, built on a miss."""
+    key = f'analytics.snapshot.{get_version()}'
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_snapshot()
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
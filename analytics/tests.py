@@ -1,3 +1,103 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from analytics.rollups import rollup_day
+from core.models import (
+    Analytics, AnalyticsRollup, Attendance, Class, ClassJoinRequest, Enrollment, Faculty, Quiz, QuizAttempt, QuizGrade,
+    Student,
+)
+
+
+class AnalyticsSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i, (status, college) in enumerate([('ACTIVE', 'CCS'), ('ACTIVE', 'CEA'), ('DISABLED', 'CCS')]):
+            Faculty.objects.create(
+                faculty_id=f'F-{i}', first_name='First', last_name='Last', college_name=college,
+                department_name='IT', status=status, email=f'faculty{i}@example.com',
+            )
+        for i, (course, year) in enumerate([('BSIT', '1'), ('BSIT', '2'), ('BSCS', '1'), ('', '')]):
+            Student.objects.create(
+                student_id=f'2024-{i:04d}', first_name='First', last_name='Last', email=f'student{i}@example.com',
+                course=course, year=year,
+            )
+
+    def test_snapshot_has_every_series_and_is_cached(self):
+        with self.assertNumQueries(2):
+            snapshot = self.client.get(reverse('analytics_snapshot')).json()
+        with self.assertNumQueries(0):
+            self.client.get(reverse('analytics_snapshot'))
+
+        self.assertEqual((snapshot['total_faculty'], snapshot['active_faculty'], snapshot['total_students']), (3, 2, 4))
+        self.assertEqual(snapshot['charts']['account_status']['data'], [2, 1])
+        self.assertEqual(snapshot['charts']['faculty_college']['labels'], ['CCS', 'CEA'])
+        self.assertEqual(snapshot['students_by_course'], {'BSCS': 1, 'BSIT': 2})
+        self.assertEqual(snapshot['charts']['student_year'], {
+            'labels': ['Year 1', 'Year 2'], 'data': [2, 1], 'colors': ['#10B981', '#059669'],
+        })
+
+    def test_saving_faculty_or_students_expires_the_snapshot(self):
+        self.client.get(reverse('analytics_snapshot'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Faculty.objects.filter(faculty_id='F-2').get().delete()
+
+        self.assertEqual(self.client.get(reverse('get_faculty_count')).json(), {'count': 2})
+        self.assertEqual(self.client.get(reverse('get_faculty_by_status'), {'status': 'DISABLED'}).json(), {'count': 0})
+
+    def test_page_view_does_not_write(self):
+        self.client.get(reverse('analytics'))
+        self.assertFalse(Analytics.objects.exists())
+
+
+class AnalyticsRollupTests(TestCase):
+    def setUp(self):
+        faculty = Faculty.objects.create(
+            faculty_id='F-1', first_name='First', last_name='Last', college_name='CCS', department_name='IT',
+            email='faculty@example.com',
+        )
+        self.class_obj = Class.objects.create(
+            faculty=faculty, subject_name='Algebra', subject_code='ALG', description='', schedule='MWF', room='101',
+        )
+        self.quiz = Quiz.objects.create(title='Quiz 1', class_obj=self.class_obj, faculty=faculty, total_points=10)
+        self.day = timezone.localdate()
+        self.students = [
+            Student.objects.create(student_id=f'2024-{i:04d}', first_name='First', last_name='Last', email=f's{i}@example.com')
+            for i in range(3)
+        ]
+        for student, status, score in zip(self.students, ['Present', 'Present', 'Late'], [9.5, 7, 3]):
+            Enrollment.objects.create(student=student, enrolled_class=self.class_obj)
+            Attendance.objects.create(student=student, class_obj=self.class_obj, date=self.day, status=status)
+            attempt = QuizAttempt.objects.create(student=student, quiz=self.quiz, score=score, max_score=10)
+            QuizGrade.objects.create(student=student, quiz=self.quiz, attempt=attempt, score=score, max_score=10, percentage=0)
+        ClassJoinRequest.objects.create(student=self.students[0], class_requested=self.class_obj)
+
+    def test_rollups_are_idempotent_per_day(self):
+        call_command('rollup_analytics', date=self.day.isoformat(), stdout=StringIO())
+        call_command('rollup_analytics', date=self.day.isoformat(), stdout=StringIO())
+
+        facts = set(AnalyticsRollup.objects.values_list('metric', 'dimension', 'value'))
+        self.assertEqual(facts, {
+            ('enrollments', 'total', 3), ('enrollments', 'new', 3),
+            ('attendance', 'Present', 2), ('attendance', 'Late', 1),
+            ('join_requests', 'pending', 1),
+            ('grades', 'A', 1), ('grades', 'C', 1), ('grades', 'F', 1),
+        })
+
+    def test_range_endpoint_reads_the_rollups(self):
+        rollup_day(self.day)
+        yesterday = self.day - timedelta(days=1)
+        url = reverse('analytics_rollups', args=['attendance'])
+
+        with self.assertNumQueries(1):
+            data = self.client.get(url, {'start': yesterday.isoformat(), 'end': self.day.isoformat()}).json()
 
-# Create your tests here.
+        self.assertEqual(data['dates'], [yesterday.isoformat(), self.day.isoformat()])
+        self.assertEqual(data['series'], {'Late': [0, 1], 'Present': [0, 2]})
+        self.assertEqual(self.client.get(url, {'start': self.day.isoformat(), 'end': yesterday.isoformat()}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('analytics_rollups', args=['nonsense'])).status_code, 404)
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import analytics_view, get_faculty_count, get_student_count, get_active_faculty_count, get_faculty_by_status, get_faculty_by_college, get_colleges, get_students_by_course, get_students_by_year, get_courses, get_years, get_account_status_chart_data, get_faculty_college_chart_data, get_student_course_chart_data, get_student_year_chart_data
+from .views import analytics_view, analytics_snapshot, analytics_rollups, get_faculty_count, get_student_count, get_active_faculty_count, get_faculty_by_status, get_faculty_by_college, get_colleges, get_students_by_course, get_students_by_year, get_courses, get_years, get_account_status_chart_data, get_faculty_college_chart_data, get_student_course_chart_data, get_student_year_chart_data
 
 urlpatterns = [
     path('', analytics_view, name='analytics'),
+    path('snapshot/', analytics_snapshot, name='analytics_snapshot'),
+    path('rollups/<str:metric>/', analytics_rollups, name='analytics_rollups'),
     path('get_faculty_count/', get_faculty_count, name='get_faculty_count'),
     path('get_student_count/', get_student_count, name='get_student_count'),
     path('get_active_faculty_count/', get_active_faculty_count, name='get_active_faculty_count'),
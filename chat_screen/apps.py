@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ChatScreenConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat_screen'
+
+    def ready(self):
+        from chat_screen import signals  # noqa: F401
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+# Override with CHAT_BROKER in settings, e.g. to share events between
+# several ASGI workers:
+#   CHAT_BROKER = {'BACKEND': 'chat_screen.broker.RedisBroker', 'OPTIONS': {'url': 'redis://localhost:6379/0'}}
+DEFAULT_CHAT_BROKER = {'BACKEND': 'chat_screen.broker.InMemoryBroker', 'OPTIONS': {}}
+
+LONG_POLL_TIMEOUT = 25
+
+# Long polls re-check the database this often even without a broker event,
+# in case the event was published by another worker of an in-memory broker.
+LONG_POLL_RECHECK = 5
+
+
+class BaseBroker:
+    """
+    Publish/subscribe transport for chat events. ``publish`` may be called
+    from any thread (sync views); ``subscribe`` is an async context manager
+    yielding a subscription whose ``get()`` waits for the next event.
+    Events are JSON-serializable dicts.
+    """
+
+    def publish(self, channel, event):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+
+class InMemoryBroker(BaseBroker):
+    """Delivers events to subscribers of the same process only."""
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def publish(self, channel, event):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self.lock:
+            self.subscribers[channel].add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self.lock:
+                self.subscribers[channel].discard(subscriber)
+                if not self.subscribers[channel]:
+                    del self.subscribers[channel]
+
+
+class RedisSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self):
+        while True:
+            message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+            if message is not None:
+                return json.loads(message['data'])
+
+
+class RedisBroker(BaseBroker):
+    """Delivers events through Redis (or a compatible server) pub/sub, across processes."""
+
+    def __init__(self, url='redis://localhost:6379/0'):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('RedisBroker requires the redis package')
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, channel, event):
+        self.client.publish(channel, json.dumps(event))
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            yield RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+            await client.aclose()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    config = getattr(settings, 'CHAT_BROKER', DEFAULT_CHAT_BROKER)
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+async def long_poll(fetch, channel, timeout=LONG_POLL_TIMEOUT):
+    """
+    Await ``fetch()`` until it returns rows or ``timeout`` seconds pass,
+    sleeping on the broker ``channel`` in between instead of holding a
+    worker thread. Returns the last (possibly empty) result of ``fetch``.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    # Subscribe first so an event published during the first fetch is not missed.
+    async with get_broker().subscribe(channel) as subscription:
+        while True:
+            rows = await fetch()
+            remaining = deadline - loop.time()
+            if rows or remaining <= 0:
+                return rows
+            try:
+                await asyncio.wait_for(subscription.get(), min(remaining, LONG_POLL_RECHECK))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from django.db.models import Q
+
+PAGE_SIZE = 50
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(message):
+    return f"{message.timestamp.isoformat()}_{message.id}"
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, message_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(timestamp), int(message_id)
+    except (AttributeError, ValueError):
+        raise InvalidCursor(f'Invalid cursor {cursor!r}')
+
+
+def get_message_page(conversation, before=None, limit=PAGE_SIZE):
+    """
+    The ``limit`` messages of ``conversation`` just older than the ``before``
+    cursor (the latest ones without a cursor), oldest first, and the cursor
+    of the next older page or None when there are no older messages.
+
+    Pages are keyed on ``(timestamp, id)`` so each one is a range scan of
+    the message index however deep into the history it is.
+    """
+    messages = conversation.messages.select_related('sender').order_by('-timestamp', '-id')
+    if before:
+        timestamp, message_id = decode_cursor(before)
+        messages = messages.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=message_id))
+
+    page = list(messages[:limit + 1])
+    older = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    page = page[:limit]
+    page.reverse()
+    return page, older
+
+
+def serialize_message(message, viewer_id):
+    """A message as JSON, as seen by the student with id ``viewer_id``."""
+    return {
+        'id': message.id,
+        'sender': 'You' if message.sender_id == viewer_id else message.sender.first_name,
+        'is_mine': message.sender_id == viewer_id,
+        'content': message.content,
+        'timestamp': message.timestamp.isoformat(),
+        'is_read': message.is_read,
+    }
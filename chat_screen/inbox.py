@@ -0,0 +1,59 @@
+from django.db.models import Exists, F, OuterRef, Subquery
+
+from core.models import Conversation, ConversationParticipant, Message, Student
+
+
+def get_inbox(student):
+    """
+    The conversations of ``student``, most recently active first, each as
+    ``{'conversation', 'other_participant', 'last_message', 'unread_count',
+    'is_muted'}``.
+
+    Reads the last message and unread count kept on the conversation and
+    its participant rows by core.conversations, so the cost does not grow
+    with the number of messages: one query for the student's conversations
+    and one for the other participants.
+    """
+    other_participant = ConversationParticipant.objects.filter(
+        conversation_id=OuterRef('conversation_id'),
+    ).exclude(student_id=student.id)
+    muted = Conversation.muted_by.through.objects.filter(
+        conversation_id=OuterRef('conversation_id'), student_id=student.id,
+    )
+
+    memberships = list(
+        ConversationParticipant.objects.filter(student=student).select_related('conversation').annotate(
+            other_participant_id=Subquery(other_participant.order_by('id').values('student_id')[:1]),
+            is_muted=Exists(muted),
+        ).order_by(
+            F('conversation__last_message_at').desc(nulls_last=True),
+            '-conversation__created_at',
+            '-conversation_id',
+        )
+    )
+
+    participants = Student.objects.in_bulk({membership.other_participant_id for membership in memberships} - {None})
+    participants[student.id] = student
+
+    inbox = []
+    for membership in memberships:
+        conversation = membership.conversation
+        last_message = None
+        if conversation.last_message_at is not None:
+            last_message = Message(
+                conversation=conversation,
+                sender_id=conversation.last_message_sender_id,
+                content=conversation.last_message_preview,
+                timestamp=conversation.last_message_at,
+            )
+            # Two-party chats: the sender is one of the participants already loaded.
+            if last_message.sender_id in participants:
+                last_message.sender = participants[last_message.sender_id]
+        inbox.append({
+            'conversation': conversation,
+            'other_participant': participants.get(membership.other_participant_id),
+            'last_message': last_message,
+            'unread_count': membership.unread_count,
+            'is_muted': membership.is_muted,
+        })
+    return inbox
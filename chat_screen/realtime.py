@@ -0,0 +1,160 @@
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from chat_screen.broker import get_broker
+from chat_screen.history import serialize_message
+from core.conversations import mark_read
+from core.middleware import get_principal_for
+from core.models import Conversation, ConversationParticipant
+
+CHAT_SOCKET_PATH = '/ws/chat/'
+
+# Notifications are not addressed to anyone in particular, so they share one channel.
+NOTIFICATION_CHANNEL = 'notifications'
+
+# WebSocket close codes sent before accepting a connection.
+CLOSE_FORBIDDEN = 4403
+CLOSE_NOT_FOUND = 4404
+
+
+def run_with_fresh_connections(func, *args):
+    """
+    Run ``func`` with the connection handling a request would get. The socket
+    lives outside the request cycle, so without this its worker thread would
+    keep connections past the database's idle timeout.
+    """
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def database_call(func, *args):
+    return await sync_to_async(run_with_fresh_connections)(func, *args)
+
+
+def student_channel(student_id):
+    return f'chat.student.{student_id}'
+
+
+def participant_ids(conversation_id):
+    return list(ConversationParticipant.objects.filter(
+        conversation_id=conversation_id,
+    ).values_list('student_id', flat=True))
+
+
+def publish_message(message):
+    """Push a new message to every participant of its conversation, as each of them sees it."""
+    broker = get_broker()
+    for student_id in participant_ids(message.conversation_id):
+        broker.publish(student_channel(student_id), {
+            'type': 'message',
+            'conversation_id': message.conversation_id,
+            'message': serialize_message(message, student_id),
+        })
+
+
+def publish_read(conversation_id, reader):
+    """Tell the other participants that ``reader`` has read the conversation."""
+    broker = get_broker()
+    for student_id in participant_ids(conversation_id):
+        if student_id != reader.id:
+            broker.publish(student_channel(student_id), {
+                'type': 'read',
+                'conversation_id': conversation_id,
+                'reader_id': reader.id,
+            })
+
+
+def publish_notification(notification):
+    get_broker().publish(NOTIFICATION_CHANNEL, {'type': 'notification', 'id': notification.id})
+
+
+def read_conversation(student, conversation_id):
+    """Mark a conversation read for a participant and send the read receipt."""
+    conversation = Conversation.objects.filter(id=conversation_id, participants=student).first()
+    if conversation and mark_read(conversation, student):
+        publish_read(conversation.id, student)
+
+
+def get_socket_student(scope):
+    """The student logged in on the session cookie of a WebSocket handshake, or None."""
+    headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope.get('headers', [])}
+    cookie = SimpleCookie(headers.get('cookie', ''))
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    session = import_module(settings.SESSION_ENGINE).SessionStore(morsel.value)
+    return get_principal_for(SimpleNamespace(session=session), 'student')
+
+
+def is_same_origin(scope):
+    """Reject cross-site handshakes, which would otherwise ride on the session cookie."""
+    headers = dict(scope.get('headers', []))
+    origin = headers.get(b'origin')
+    if origin is None:
+        return True
+    return urlparse(origin.decode('latin-1')).netloc == headers.get(b'host', b'').decode('latin-1')
+
+
+async def handle_client_event(student, text):
+    try:
+        event = json.loads(text or '')
+    except ValueError:
+        return
+    if not isinstance(event, dict) or event.get('type') != 'read':
+        return
+    try:
+        conversation_id = int(event.get('conversation_id'))
+    except (TypeError, ValueError):
+        return
+    await database_call(read_conversation, student, conversation_id)
+
+
+async def chat_socket(scope, receive, send):
+    """
+    ASGI WebSocket endpoint: forwards the broker events of the logged in
+    student's channel, and accepts ``{"type": "read", "conversation_id"}``
+    from the client.
+    """
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    if scope['path'] != CHAT_SOCKET_PATH:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+
+    student = await database_call(get_socket_student, scope) if is_same_origin(scope) else None
+    if student is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+
+    async with get_broker().subscribe(student_channel(student.id)) as subscription:
+        # Subscribed before accepting, so no event is lost in between.
+        await send({'type': 'websocket.accept'})
+        receiving = asyncio.ensure_future(receive())
+        delivering = asyncio.ensure_future(subscription.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait({receiving, delivering}, return_when=asyncio.FIRST_COMPLETED)
+                if delivering in done:
+                    await send({'type': 'websocket.send', 'text': json.dumps(delivering.result())})
+                    delivering = asyncio.ensure_future(subscription.get())
+                if receiving in done:
+                    event = receiving.result()
+                    if event['type'] == 'websocket.disconnect':
+                        break
+                    if event['type'] == 'websocket.receive':
+                        await handle_client_event(student, event.get('text'))
+                    receiving = asyncio.ensure_future(receive())
+        finally:
+            receiving.cancel()
+            delivering.cancel()
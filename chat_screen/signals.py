@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from chat_screen.realtime import publish_notification
+from core.models import Notification
+
+
+@receiver(post_save, sender=Notification)
+def announce_notification(sender, instance, created, **kwargs):
+    # Wakes the notification long polls; they read the rows themselves.
+    if created:
+        transaction.on_commit(lambda: publish_notification(instance))
@@ -1,3 +1,205 @@
+import asyncio
+import json
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.urls import reverse
+
+from chat_screen.broker import get_broker, long_poll
+from chat_screen.history import get_message_page
+from chat_screen.inbox import get_inbox
+from chat_screen.realtime import chat_socket, publish_message
+from core.conversations import mark_read, post_message
+from core.models import Conversation, ConversationParticipant, Message, Student
+
+
+class InboxTests(TestCase):
+    def setUp(self):
+        self.me = self.student(0)
+        self.friends = [self.student(i) for i in range(1, 4)]
+        self.conversations = [Conversation.get_or_create_conversation(self.me, friend) for friend in self.friends]
+
+    def student(self, i):
+        return Student.objects.create(
+            student_id=f'2024-{i:04d}', first_name=f'First{i}', last_name=f'Last{i}', email=f'student{i}@example.com',
+        )
+
+    def test_inbox_is_ordered_by_last_activity_in_two_queries(self):
+        first, second, third = self.conversations
+        post_message(second, self.friends[1], 'hi')
+        post_message(first, self.me, 'hello')
+        post_message(first, self.friends[0], 'how are you?')
+        first.muted_by.add(self.me)
+
+        with self.assertNumQueries(2):
+            inbox = get_inbox(self.me)
+            self.assertEqual(inbox[0]['last_message'].sender.first_name, 'First1')
+
+        self.assertEqual([row['conversation'] for row in inbox], [first, second, third])
+        self.assertEqual([row['other_participant'] for row in inbox], self.friends)
+        self.assertEqual([row['unread_count'] for row in inbox], [1, 1, 0])
+        self.assertEqual([row['is_muted'] for row in inbox], [True, False, False])
+        self.assertEqual(inbox[0]['last_message'].content, 'how are you?')
+        self.assertIsNone(inbox[2]['last_message'])
+
+    def test_conversations_are_looked_up_by_pair_key(self):
+        with self.assertNumQueries(1):
+            conversation = Conversation.get_or_create_conversation(self.friends[0], self.me)
+        self.assertEqual(conversation, self.conversations[0])
+        self.assertEqual(conversation.pair_key, f'{self.me.pk}:{self.friends[0].pk}')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Conversation.objects.create(pair_key=conversation.pair_key)
+
+    def test_counters_follow_messages_and_can_be_rebuilt(self):
+        conversation = self.conversations[0]
+        post_message(conversation, self.friends[0], 'one')
+        post_message(conversation, self.friends[0], 'two')
+        counter = ConversationParticipant.objects.get(conversation=conversation, student=self.me)
+        self.assertEqual(counter.unread_count, 2)
+
+        mark_read(conversation, self.me)
+        counter.refresh_from_db()
+        self.assertEqual(counter.unread_count, 0)
+        self.assertFalse(conversation.messages.filter(is_read=False).exists())
+
+        Message.objects.create(conversation=conversation, sender=self.friends[0], content='written elsewhere')
+        call_command('rebuild_conversation_state', stdout=StringIO())
+        counter.refresh_from_db()
+        conversation.refresh_from_db()
+        self.assertEqual(counter.unread_count, 1)
+        self.assertEqual(conversation.last_message_preview, 'written elsewhere')
+
+
+class MessageHistoryTests(TestCase):
+    def setUp(self):
+        self.me = Student.objects.create(student_id='2024-0001', first_name='Juan', last_name='Cruz', email='juan@example.com')
+        self.friend = Student.objects.create(student_id='2024-0002', first_name='Ana', last_name='Reyes', email='ana@example.com')
+        self.conversation = Conversation.get_or_create_conversation(self.me, self.friend)
+        self.messages = [post_message(self.conversation, self.friend, f'message {i}') for i in range(7)]
+
+    def test_pages_walk_back_through_the_history(self):
+        page, cursor = get_message_page(self.conversation, limit=3)
+        self.assertEqual(page, self.messages[4:])
+
+        page, cursor = get_message_page(self.conversation, before=cursor, limit=3)
+        self.assertEqual(page, self.messages[1:4])
+
+        page, cursor = get_message_page(self.conversation, before=cursor, limit=3)
+        self.assertEqual((page, cursor), (self.messages[:1], None))
+
+    def test_older_messages_endpoint(self):
+        session = self.client.session
+        session['role'] = 'student'
+        session['user_id'] = self.me.student_id
+        session.save()
+        url = reverse('conversation_messages', args=[self.conversation.id])
+
+        _, cursor = get_message_page(self.conversation, limit=2)
+        data = self.client.get(url, {'before': cursor}).json()
+        self.assertEqual([message['content'] for message in data['messages']][-1], 'message 4')
+        self.assertEqual(self.client.get(url, {'before': 'nonsense'}).status_code, 400)
+
+
+class ChatSocketTests(TestCase):
+    def setUp(self):
+        # Closing connections would end the test's transaction; check the calls instead.
+        patcher = mock.patch('chat_screen.realtime.close_old_connections')
+        self.close_old_connections = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.me = Student.objects.create(student_id='2024-0001', first_name='Juan', last_name='Cruz', email='juan@example.com')
+        self.friend = Student.objects.create(student_id='2024-0002', first_name='Ana', last_name='Reyes', email='ana@example.com')
+        self.conversation = Conversation.get_or_create_conversation(self.me, self.friend)
+        session = self.client.session
+        session['role'] = 'student'
+        session['user_id'] = self.me.student_id
+        session.save()
+        self.scope = {
+            'type': 'websocket',
+            'path': '/ws/chat/',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'cookie', f'{settings.SESSION_COOKIE_NAME}={session.session_key}'.encode()),
+            ],
+        }
+
+    def run_socket(self, scope, on_accept=None):
+        async def run():
+            incoming = asyncio.Queue()
+            sent = []
+
+            async def send(event):
+                sent.append(event)
+                if event['type'] == 'websocket.accept' and on_accept:
+                    await sync_to_async(on_accept)()
+                elif event['type'] == 'websocket.send':
+                    await incoming.put({'type': 'websocket.disconnect'})
+
+            await incoming.put({'type': 'websocket.connect'})
+            await asyncio.wait_for(chat_socket(scope, incoming.get, send), timeout=5)
+            return sent
+
+        return async_to_sync(run)()
+
+    def test_new_messages_are_pushed_to_participants(self):
+        def friend_writes():
+            publish_message(post_message(self.conversation, self.friend, 'are you there?'))
+
+        sent = self.run_socket(self.scope, friend_writes)
+
+        self.assertEqual(sent[0]['type'], 'websocket.accept')
+        event = json.loads(sent[1]['text'])
+        self.assertEqual((event['type'], event['conversation_id']), ('message', self.conversation.id))
+        self.assertEqual(event['message']['content'], 'are you there?')
+        self.assertFalse(event['message']['is_mine'])
+        # Before and after looking up the session's student.
+        self.assertEqual(self.close_old_connections.call_count, 2)
+
+    def test_handshakes_without_a_student_session_or_from_other_sites_are_refused(self):
+        anonymous = dict(self.scope, headers=[(b'host', b'testserver')])
+        cross_site = dict(self.scope, headers=self.scope['headers'] + [(b'origin', b'https://evil.example')])
+        for scope in (anonymous, cross_site):
+            self.assertEqual(self.run_socket(scope), [{'type': 'websocket.close', 'code': 4403}])
+
+
+class LongPollTests(TestCase):
+    def test_long_poll_wakes_on_broker_events(self):
+        rows = []
+
+        async def fetch():
+            return list(rows)
+
+        async def run():
+            async def publish_later():
+                await asyncio.sleep(0.05)
+                rows.append('new')
+                get_broker().publish('test.long-poll', {'type': 'test'})
+
+            asyncio.ensure_future(publish_later())
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            result = await long_poll(fetch, 'test.long-poll', timeout=3)
+            return result, loop.time() - started
+
+        result, elapsed = async_to_sync(run)()
+        self.assertEqual(result, ['new'])
+        self.assertLess(elapsed, 1)
+
+    def test_since_endpoint_returns_only_newer_messages(self):
+        me = Student.objects.create(student_id='2024-0001', first_name='Juan', last_name='Cruz', email='juan@example.com')
+        friend = Student.objects.create(student_id='2024-0002', first_name='Ana', last_name='Reyes', email='ana@example.com')
+        conversation = Conversation.get_or_create_conversation(me, friend)
+        first = post_message(conversation, friend, 'first')
+        post_message(conversation, friend, 'second')
+        session = self.client.session
+        session['role'] = 'student'
+        session['user_id'] = me.student_id
+        session.save()
 
-# Create your tests here.
+        data = self.client.get(reverse('conversation_since', args=[conversation.id]), {'after': first.id}).json()
+        self.assertEqual([message['content'] for message in data['messages']], ['second'])
+        self.assertEqual(data['after'], first.id + 1)
@@ -1,31 +1,25 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponseBadRequest
-from django.db.models import Q
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import HttpResponseBadRequest, JsonResponse
 from functools import wraps
-from core.models import Conversation, Message, Student, Faculty, AdminUser
+from core.models import Conversation, Student
+from core.student_search import search_students as find_students
+from core.middleware import get_principal, get_principal_for
+from core.conversations import mark_read, post_message
+from chat_screen.broker import long_poll
+from chat_screen.history import PAGE_SIZE, InvalidCursor, get_message_page, serialize_message
+from chat_screen.inbox import get_inbox
+from chat_screen.realtime import publish_message, publish_read, student_channel
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 
 def get_user_from_session(request):
     """Get authenticated user and role from session"""
-    user_id = request.session.get('user_id')
-    if not user_id:
+    user = get_principal(request)
+    if not user:
         return None, None
-    
-    # Try to find user in each model
-    for model, id_field in [
-        (Student, 'student_id'),
-        (Faculty, 'faculty_id'),
-        (AdminUser, 'employee_id')
-    ]:
-        try:
-            user = model.objects.get(**{id_field: user_id})
-            role = model.__name__.lower()
-            return user, role
-        except model.DoesNotExist:
-            continue
-    
-    return None, None
+    return user, type(user).__name__.lower()
 
 def student_only(view_func):
     """Decorator to restrict access to students only"""
@@ -92,14 +86,60 @@ def conversation_detail(request, user, conversation_id):
     
     # Mark messages as read
     _mark_messages_as_read(conversation, user)
+
+    # Only the latest page is rendered; older pages come from conversation_messages.
+    page, older_cursor = get_message_page(conversation)
     
     return render(request, 'chat_screen/conversation_detail.html', {
         'conversation': conversation,
-        'messages': conversation.messages.all(),
+        'messages': page,
+        'older_cursor': older_cursor,
+        'current_student': user,
         'other_participant': other_participant,
         'role': 'student'
     })
 
+@student_only
+def conversation_messages(request, user, conversation_id):
+    """Older messages of a conversation as JSON, one page before the ``before`` cursor"""
+    conversation = get_object_or_404(Conversation, id=conversation_id, participants=user)
+    try:
+        page, older_cursor = get_message_page(conversation, before=request.GET.get('before'))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'messages': [serialize_message(message, user.id) for message in page],
+        'older_cursor': older_cursor,
+    })
+
+async def conversation_since(request, conversation_id):
+    """
+    Long poll for the messages of a conversation newer than the ``after``
+    message id, for clients without a WebSocket. Answers as soon as there
+    are any, or with an empty list after the long poll timeout.
+    """
+    user = await sync_to_async(get_principal_for)(request, 'student')
+    if not user:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    conversation = await Conversation.objects.filter(id=conversation_id, participants=user).afirst()
+    if not conversation:
+        return JsonResponse({'error': 'Conversation not found'}, status=404)
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    async def fetch():
+        new_messages = conversation.messages.select_related('sender').filter(id__gt=after).order_by('id')
+        return [message async for message in new_messages[:PAGE_SIZE]]
+
+    new_messages = await long_poll(fetch, student_channel(user.id))
+    return JsonResponse({
+        'messages': [serialize_message(message, user.id) for message in new_messages],
+        'after': new_messages[-1].id if new_messages else after,
+    })
+
 @student_only
 def send_message(request, user, conversation_id):
     """Send a message in a conversation"""
@@ -109,15 +149,17 @@ def send_message(request, user, conversation_id):
     conversation = get_object_or_404(Conversation, id=conversation_id, participants=user)
     content = request.POST.get('content', '').strip()
 
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
     if not content:
+        if is_ajax:
+            return JsonResponse({'error': 'Message is empty'}, status=400)
         return redirect('conversation_detail', conversation_id=conversation.id)
 
-    Message.objects.create(
-        conversation=conversation,
-        sender=user,
-        content=content
-    )
-    
+    message = post_message(conversation, user, content)
+    transaction.on_commit(lambda: publish_message(message))
+
+    if is_ajax:
+        return JsonResponse({'message': serialize_message(message, user.id)})
     return redirect('conversation_detail', conversation_id=conversation.id)
 
 @student_only
@@ -137,38 +179,16 @@ def unmute_conversation(request, user, conversation_id):
 # Helper functions
 def _get_user_conversations(user):
     """Get user's conversations with metadata"""
-    conversations = Conversation.objects.filter(participants=user).order_by('-created_at')
-    
-    conversation_data = []
-    for conversation in conversations:
-        other_participant = conversation.get_other_participant(user)
-        last_message = conversation.get_last_message()
-        
-        conversation_data.append({
-            'conversation': conversation,
-            'other_participant': other_participant,
-            'last_message': last_message,
-            'unread_count': conversation.get_unread_count_for_user(user)
-        })
-    
-    return conversation_data
+    return get_inbox(user)
 
 def _search_students_by_query(query, current_user):
     """Search students by name, ID, or email"""
-    return Student.objects.filter(
-        Q(first_name__icontains=query) |
-        Q(last_name__icontains=query) |
-        Q(student_id__icontains=query) |
-        Q(email__icontains=query)
-    ).exclude(id=current_user.id)[:10]
+    return find_students(query, limit=10, exclude_ids=[current_user.id])
 
 def _mark_messages_as_read(conversation, user):
     """Mark unread messages as read"""
-    conversation.messages.filter(
-        is_read=False
-    ).exclude(
-        sender=user
-    ).update(is_read=True)
+    if mark_read(conversation, user):
+        transaction.on_commit(lambda: publish_read(conversation.id, user))
 
 def _get_unread_count(conversation, user):
     """Get count of unread messages for user"""
@@ -0,0 +1,64 @@
+from django.db import transaction
+
+from core.join_request_counts import adjust_pending_count
+from core.models import ClassJoinRequest, Enrollment
+
+BATCH_SIZE = 500
+
+REVIEW_STATUSES = {'approve': 'approved', 'reject': 'rejected'}
+
+
+class NotYourClass(Exception):
+    """Some of the join requests belong to another faculty's classes."""
+
+
+def review_join_requests(faculty, action, request_ids=None, class_id=None):
+    """
+    Approve or reject (``action``) join requests of ``faculty``'s classes in
+    one transaction: the requests with ``request_ids``, or every pending
+    request for the class ``class_id``. Approved students are enrolled.
+
+    Ownership is checked for the whole batch in one query, statuses are
+    flipped with one UPDATE and enrollments written with one bulk insert.
+    Requests that are no longer pending are skipped. Returns the number of
+    requests reviewed; raises NotYourClass, leaving everything untouched,
+    if any of ``request_ids`` belongs to another faculty.
+    """
+    status = REVIEW_STATUSES[action]
+    if class_id is not None:
+        join_requests = ClassJoinRequest.objects.filter(class_requested_id=class_id, status='pending')
+    else:
+        join_requests = ClassJoinRequest.objects.filter(id__in=request_ids or [])
+
+    with transaction.atomic():
+        # Locked so a concurrent review cannot enroll the same students twice.
+        rows = list(join_requests.select_for_update().values_list(
+            'id', 'student_id', 'class_requested_id', 'class_requested__faculty_id', 'status',
+        ))
+        if any(faculty_id != faculty.faculty_id for _, _, _, faculty_id, _ in rows):
+            raise NotYourClass(f'Faculty {faculty.faculty_id} can only review requests for their own classes')
+
+        pending = [(request_id, student_id, class_pk) for request_id, student_id, class_pk, _, current in rows if current == 'pending']
+        if not pending:
+            return 0
+        ClassJoinRequest.objects.filter(id__in=[request_id for request_id, _, _ in pending]).update(status=status)
+        # update() sends no signals, so move the pending counter here.
+        transaction.on_commit(lambda: adjust_pending_count(faculty.faculty_id, -len(pending)))
+
+        if status == 'approved':
+            # Enrollment has no unique key on (student, class), so check first
+            # rather than relying on the database to skip duplicates.
+            pairs = {(student_id, class_pk) for _, student_id, class_pk in pending}
+            enrolled = set(Enrollment.objects.filter(
+                student_id__in={student_id for student_id, _ in pairs},
+                enrolled_class_id__in={class_pk for _, class_pk in pairs},
+            ).values_list('student_id', 'enrolled_class_id'))
+            Enrollment.objects.bulk_create(
+                [
+                    Enrollment(student_id=student_id, enrolled_class_id=class_pk)
+                    for student_id, class_pk in pairs - enrolled
+                ],
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+    return len(pending)
@@ -1,3 +1,128 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.join_request_counts import count_pending, get_pending_count
+from core.models import Class, ClassJoinRequest, Enrollment, Faculty, Student
+
+
+class JoinRequestTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.faculty = Faculty.objects.create(
+            faculty_id='F-001', first_name='Maria', last_name='Santos',
+            college_name='CCS', department_name='IT', email='maria@example.com',
+        )
+        session = self.client.session
+        session['role'] = 'faculty'
+        session['user_id'] = self.faculty.faculty_id
+        session.save()
+
+    def add_class(self, i, pending):
+        class_obj = Class.objects.create(
+            faculty=self.faculty, subject_name=f'Subject {i}', subject_code=f'SUB{i}',
+            description='', schedule='MWF', room='101',
+        )
+        for j in range(pending):
+            student = Student.objects.create(
+                student_id=f'2024-{i}{j:03d}', first_name=f'First{j}', last_name=f'Last{j}',
+                email=f'student{i}-{j}@example.com',
+            )
+            ClassJoinRequest.objects.create(student=student, class_requested=class_obj)
+        return class_obj
+
+
+class ClassJoinRequestViewTests(JoinRequestTestCase):
+    def get_page(self):
+        return self.client.get(reverse('class_join_request'))
+
+    def test_requests_are_grouped_by_class_in_a_fixed_number_of_queries(self):
+        first = self.add_class(1, pending=2)
+        second = self.add_class(2, pending=0)
+        self.get_page()  # counts the sidebar badge once
+
+        # Session, faculty, classes and pending requests.
+        with self.assertNumQueries(4):
+            self.get_page()
+        self.add_class(3, pending=3)
+        with self.assertNumQueries(4):
+            response = self.get_page()
+
+        requests_map = response.context['class_join_requests_map']
+        self.assertEqual(list(requests_map)[:2], [first, second])
+        self.assertEqual([len(requests) for requests in requests_map.values()], [2, 0, 3])
+        self.assertTrue(response.context['has_pending'])
+        self.assertEqual(response.context['debug_info']['pending_requests_count'], 5)
+
+
+class BulkReviewTests(JoinRequestTestCase):
+    def post(self, **data):
+        return self.client.post(reverse('bulk_review_join_requests'), data, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def test_selected_requests_are_approved_and_enrolled_in_one_transaction(self):
+        class_obj = self.add_class(1, pending=3)
+        first, second, third = ClassJoinRequest.objects.order_by('id')
+        Enrollment.objects.create(student=first.student, enrolled_class=class_obj)
+
+        response = self.post(action='approve', request_ids=[first.id, second.id])
+
+        self.assertEqual(response.json(), {'reviewed': 2, 'status': 'approved'})
+        self.assertEqual(
+            list(ClassJoinRequest.objects.order_by('id').values_list('status', flat=True)),
+            ['approved', 'approved', 'pending'],
+        )
+        self.assertEqual(Enrollment.objects.filter(enrolled_class=class_obj).count(), 2)
+
+    def test_all_pending_requests_of_a_class_can_be_rejected(self):
+        class_obj = self.add_class(1, pending=2)
+        other = self.add_class(2, pending=1)
+
+        self.assertEqual(self.post(action='reject', class_id=class_obj.id).json()['reviewed'], 2)
+        self.assertEqual(ClassJoinRequest.objects.filter(status='pending').get().class_requested, other)
+        self.assertFalse(Enrollment.objects.exists())
+
+    def test_batches_with_another_faculty_request_are_refused(self):
+        self.add_class(1, pending=1)
+        colleague = Faculty.objects.create(
+            faculty_id='F-002', first_name='Jose', last_name='Rizal',
+            college_name='CCS', department_name='IT', email='jose@example.com',
+        )
+        foreign = ClassJoinRequest.objects.create(
+            student=Student.objects.first(),
+            class_requested=Class.objects.create(
+                faculty=colleague, subject_name='Other', subject_code='OTH',
+                description='', schedule='TTh', room='202',
+            ),
+        )
+
+        response = self.post(action='approve', request_ids=list(ClassJoinRequest.objects.values_list('id', flat=True)))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ClassJoinRequest.objects.exclude(status='pending').exists())
+        self.assertEqual(self.post(action='approve', class_id=foreign.class_requested_id).status_code, 403)
+
+
+class PendingCountTests(JoinRequestTestCase):
+    def badge(self):
+        return self.client.get(reverse('class_join_request')).context['pending_join_requests_count']
+
+    def test_counter_follows_requests_without_recounting(self):
+        class_obj = self.add_class(1, pending=2)
+        self.assertEqual(self.badge(), 2)
+
+        student = Student.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            join_request = ClassJoinRequest.objects.create(student=student, class_requested=class_obj)
+        self.assertEqual(get_pending_count(self.faculty.faculty_id), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            join_request.status = 'rejected'
+            join_request.save()
+            ClassJoinRequest.objects.filter(status='pending').first().delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_pending_count(self.faculty.faculty_id), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('bulk_review_join_requests'), {'action': 'approve', 'class_id': class_obj.id})
+        self.assertEqual(self.badge(), 0)
+        self.assertEqual(count_pending(self.faculty.faculty_id), 0)
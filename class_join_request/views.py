@@ -1,9 +1,11 @@
 from django.contrib import messages
 from django.shortcuts import get_object_or_404, redirect, render
-from collections import defaultdict
 import logging
 from django.http import JsonResponse
 
+from class_join_request.review import REVIEW_STATUSES, NotYourClass, review_join_requests
+
+from core.middleware import get_principal_for
 from core.models import Class, ClassJoinRequest, Enrollment, Faculty
 
 # Set up logging
@@ -51,47 +53,45 @@ def debug_join_requests(request):
     
     return JsonResponse(debug_info)
 
-def update_session_pending_count(request, faculty):
-    """Update session with pending request count for notifications"""
-    try:
-        classes = Class.objects.filter(faculty=faculty)
-        pending_count = ClassJoinRequest.objects.filter(
-            class_requested__in=classes, 
-            status='pending'
-        ).count()
-        request.session['pending_requests_count'] = pending_count
-        request.session.modified = True
-    except Exception as e:
-        logger.error(f"Error updating session pending count: {e}")
+def get_pending_requests_by_class(faculty):
+    """
+    The faculty's classes (by subject name) mapped to their pending join
+    requests, oldest first. Two queries whatever the number of classes.
+    """
+    classes = {class_obj.id: class_obj for class_obj in Class.objects.filter(faculty=faculty).order_by('subject_name')}
+    requests_by_class = {class_id: [] for class_id in classes}
+    pending = ClassJoinRequest.objects.filter(
+        class_requested__faculty=faculty,
+        status='pending',
+    ).select_related('student').order_by('requested_at', 'id')
+    for join_request in pending:
+        join_request.class_requested = classes[join_request.class_requested_id]
+        requests_by_class[join_request.class_requested_id].append(join_request)
+    return {class_obj: requests_by_class[class_id] for class_id, class_obj in classes.items()}
+
 
 def class_join_request_view(request):
     logger.info("Class join request view accessed")
     
     # Get faculty_id from session
     faculty_id = request.session.get('user_id')
-    logger.info(f"Faculty ID from session: {faculty_id}")
     
     if not faculty_id:
         logger.error("No faculty_id in session")
         messages.error(request, 'Faculty authentication required')
         return redirect('login')
 
-    try:
-        faculty = Faculty.objects.get(faculty_id=faculty_id)
-        logger.info(f"Found faculty: {faculty}")
-    except Faculty.DoesNotExist:
+    faculty = get_principal_for(request, 'faculty')
+    if not faculty:
         logger.error(f"Faculty with ID {faculty_id} not found")
         messages.error(request, 'Faculty not found')
         return redirect('login')
 
-    # Update session with pending count
-    update_session_pending_count(request, faculty)
+    class_join_requests_map = get_pending_requests_by_class(faculty)
+    all_pending = [join_request for join_requests in class_join_requests_map.values() for join_request in join_requests]
+    logger.debug(f"Faculty {faculty_id} teaches {len(class_join_requests_map)} classes with {len(all_pending)} pending requests")
 
-    # Get all classes taught by this faculty
-    classes = Class.objects.filter(faculty=faculty).order_by('subject_name')
-    logger.info(f"Faculty {faculty.first_name} teaches {classes.count()} classes")
-    
-    if classes.count() == 0:
+    if not class_join_requests_map:
         messages.warning(request, f'You are not assigned to any classes. Please contact the administrator.')
         context = {
             'role': 'faculty',
@@ -102,35 +102,20 @@ def class_join_request_view(request):
         }
         return render(request, 'class_join_request/class_join_request_list.html', context)
 
-    # Prepare a mapping of each class to its join requests
-    class_join_requests_map = defaultdict(list)
-
-    for class_obj in classes:
-        join_requests = ClassJoinRequest.objects.filter(class_requested=class_obj, status='pending').select_related('student')
-        class_join_requests_map[class_obj] = join_requests
-        logger.info(f"Class {class_obj.subject_name} has {join_requests.count()} pending requests")
-    
-    has_pending = any(join_requests.exists() for join_requests in class_join_requests_map.values())
-    logger.info(f"Has pending requests: {has_pending}")
-
-    # Get all pending join requests for this faculty's classes
-    all_pending = ClassJoinRequest.objects.filter(class_requested__in=classes, status='pending')
-    logger.info(f"All pending join requests for faculty {faculty_id}: {list(all_pending)}")
-
     # Add notification for new requests
-    if all_pending.count() > 0:
-        messages.info(request, f'You have {all_pending.count()} pending join request(s) to review.')
+    if all_pending:
+        messages.info(request, f'You have {len(all_pending)} pending join request(s) to review.')
 
     context = {
         'role': 'faculty',
         'faculty': faculty,
-        'class_join_requests_map': dict(class_join_requests_map),
-        'has_pending': has_pending,
+        'class_join_requests_map': class_join_requests_map,
+        'has_pending': bool(all_pending),
         'debug_info': {
             'faculty_id': faculty_id,
-            'classes_count': classes.count(),
-            'pending_requests_count': all_pending.count(),
-            'all_pending_requests': list(all_pending)
+            'classes_count': len(class_join_requests_map),
+            'pending_requests_count': len(all_pending),
+            'all_pending_requests': all_pending,
         }
     }
     return render(request, 'class_join_request/class_join_request_list.html', context)
@@ -175,9 +160,6 @@ def approve_join_request(request, request_id):
         
         messages.success(request, f"Join request approved. {join_request.student.first_name} {join_request.student.last_name} has been enrolled in {join_request.class_requested.subject_name}.")
         
-        # Update session pending count
-        update_session_pending_count(request, faculty)
-        
         return redirect('class_join_request')
         
     except Exception as e:
@@ -213,12 +195,54 @@ def reject_join_request(request, request_id):
         
         messages.success(request, f"Join request rejected for {join_request.student.first_name} {join_request.student.last_name}.")
         
-        # Update session pending count
-        update_session_pending_count(request, faculty)
-        
         return redirect('class_join_request')
         
     except Exception as e:
         logger.error(f"Error rejecting join request {request_id}: {e}")
         messages.error(request, f"Error rejecting join request: {e}")
-        return redirect('class_join_request')
\ No newline at end of file
+        return redirect('class_join_request')
+
+def bulk_review_join_requests(request):
+    """
+    Approve or reject many join requests at once. POST ``action`` ("approve"
+    or "reject") with either ``request_ids`` (repeated) or ``class_id`` for
+    every pending request of that class.
+    """
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+    def fail(message, status):
+        if is_ajax:
+            return JsonResponse({'error': message}, status=status)
+        messages.error(request, message)
+        return redirect('class_join_request')
+
+    if request.method != 'POST':
+        return fail('Invalid request method', 405)
+
+    faculty = get_principal_for(request, 'faculty')
+    if not faculty:
+        return fail('Authentication required', 403)
+
+    action = request.POST.get('action')
+    if action not in REVIEW_STATUSES:
+        return fail('Invalid action', 400)
+
+    try:
+        class_id = request.POST.get('class_id')
+        class_id = int(class_id) if class_id else None
+        request_ids = [int(request_id) for request_id in request.POST.getlist('request_ids')]
+    except ValueError:
+        return fail('Invalid join request selection', 400)
+    if class_id is None and not request_ids:
+        return fail('No join requests selected', 400)
+
+    try:
+        reviewed = review_join_requests(faculty, action, request_ids=request_ids, class_id=class_id)
+    except NotYourClass:
+        return fail(f'You can only {action} requests for your own classes', 403)
+    logger.info(f"Faculty {faculty.faculty_id} {REVIEW_STATUSES[action]} {reviewed} join requests")
+
+    if is_ajax:
+        return JsonResponse({'reviewed': reviewed, 'status': REVIEW_STATUSES[action]})
+    messages.success(request, f"{reviewed} join request(s) {REVIEW_STATUSES[action]}.")
+    return redirect('class_join_request')
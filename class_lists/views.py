@@ -1,5 +1,6 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from core.models import Class, Student, Enrollment, ClassJoinRequest, FavoriteCourse, Course
+from core.middleware import get_principal_for
 from django.contrib import messages
 from django.db.models import Q
 from django.http import JsonResponse
@@ -20,16 +21,13 @@ def class_list_view(request):
     # Feature 3: Bookmark / Favorite Class
     favorited_ids = []
     requests_sent_count = 0
-    if request.session.get('user_id'):
-        try:
-            student = Student.objects.get(student_id=request.session.get('user_id'))
-            # Get the course IDs that are favorited by this student
-            favorited_course_ids = list(FavoriteCourse.objects.filter(student=student).values_list('course_id', flat=True))
-            # Get class IDs that are linked to the favorited courses
-            favorited_ids = list(Class.objects.filter(course_id__in=favorited_course_ids).values_list('id', flat=True))
-            requests_sent_count = ClassJoinRequest.objects.filter(student=student).count()
-        except Student.DoesNotExist:
-            pass
+    student = get_principal_for(request, 'student')
+    if student:
+        # Get the course IDs that are favorited by this student
+        favorited_course_ids = list(FavoriteCourse.objects.filter(student=student).values_list('course_id', flat=True))
+        # Get class IDs that are linked to the favorited courses
+        favorited_ids = list(Class.objects.filter(course_id__in=favorited_course_ids).values_list('id', flat=True))
+        requests_sent_count = ClassJoinRequest.objects.filter(student=student).count()
 
     return render(request, 'class_lists/class_list.html', {
         'classes': classes,
@@ -87,19 +85,19 @@ def pending_requests_view(request):
         messages.error(request, 'You must be logged in to view your requests.')
         return redirect('class_list')
     
-    try:
-        student = Student.objects.get(student_id=request.session.get('user_id'))
-        all_requests = ClassJoinRequest.objects.filter(
-            student=student
-        ).select_related('class_requested').order_by('-requested_at')
-        
-        return render(request, 'class_lists/pending_requests.html', {
-            'pending_requests': all_requests,
-        })
-    except Student.DoesNotExist:
+    student = get_principal_for(request, 'student')
+    if not student:
         messages.error(request, 'Student not found.')
         return redirect('class_list')
 
+    all_requests = ClassJoinRequest.objects.filter(
+        student=student
+    ).select_related('class_requested').order_by('-requested_at')
+
+    return render(request, 'class_lists/pending_requests.html', {
+        'pending_requests': all_requests,
+    })
+
 # Feature 3: Bookmark / Favorite Class
 def toggle_favorite_view(request, class_id):
     if request.method != 'POST':
@@ -108,25 +106,25 @@ def toggle_favorite_view(request, class_id):
     if not request.session.get('user_id'):
         return JsonResponse({'error': 'You must be logged in to favorite classes.'}, status=401)
     
-    try:
-        student = Student.objects.get(student_id=request.session.get('user_id'))
-        class_obj = get_object_or_404(Class, id=class_id)
-        
-        # Use the direct relationship between Class and Course
-        if not class_obj.course:
-            return JsonResponse({'error': 'This class is not linked to a course.'}, status=404)
-        
-        favorite, created = FavoriteCourse.objects.get_or_create(
-            student=student,
-            course=class_obj.course
-        )
-        
-        if not created:
-            # If it already exists, remove it (toggle off)
-            favorite.delete()
-            return JsonResponse({'favorited': False, 'message': 'Removed from favorites'})
-        else:
-            return JsonResponse({'favorited': True, 'message': 'Added to favorites'})
-            
-    except Student.DoesNotExist:
+    student = get_principal_for(request, 'student')
+    if not student:
         return JsonResponse({'error': 'Student not found.'}, status=404)
+
+    class_obj = get_object_or_404(Class, id=class_id)
+    
+    # Use the direct relationship between Class and Course
+    if not class_obj.course:
+        return JsonResponse({'error': 'This class is not linked to a course.'}, status=404)
+    
+    favorite, created = FavoriteCourse.objects.get_or_create(
+        student=student,
+        course=class_obj.course
+    )
+    
+    if not created:
+        # If it already exists, remove it (toggle off)
+        favorite.delete()
+        return JsonResponse({'favorited': False, 'message': 'Removed from favorites'})
+    else:
+        return JsonResponse({'favorited': True, 'message': 'Added to favorites'})
+
@@ -0,0 +1,179 @@
+from datetime import date
+
+from django.db import transaction
+
+from core.grade_summaries import refresh_grade_summaries
+from core.models import Class, Enrollment, ActivityRecord
+
+# Payload key of each score group posted by the class record grid.
+GRID_CATEGORIES = [
+    ('quizzes', 'Quiz'),
+    ('assignments', 'Assignment'),
+    ('seatworks', 'Seatwork'),
+    ('laboratory_works', 'Laboratory'),
+]
+
+EMPTY_SCORES = (None, '', 'null')
+
+ACTIVITY_TYPES = {activity_type for activity_type, _ in ActivityRecord.ACTIVITY_TYPE_CHOICES}
+
+BATCH_SIZE = 500
+
+
+class InvalidScore(ValueError):
+    pass
+
+
+def parse_score(score, student_id, activity_name):
+    try:
+        return float(score)
+    except (TypeError, ValueError):
+        raise InvalidScore(f'Invalid score {score!r} for {student_id} {activity_name}')
+
+
+def parse_grid(students):
+    """
+    Flatten the posted grid into ``{(student_id, activity_type, activity_name): score}``.
+    Empty cells are left out, as they were never saved by the grid.
+    """
+    cells = {}
+    for record in students:
+        student_id = record.get('id_number')
+        if not student_id:
+            continue
+        for category, activity_type in GRID_CATEGORIES:
+            for activity_name, score in (record.get(category) or {}).items():
+                if score in EMPTY_SCORES:
+                    continue
+                cells[(str(student_id), activity_type, activity_name)] = parse_score(score, student_id, activity_name)
+    return cells
+
+
+def parse_changes(changes):
+    """
+    Turn a list of changed cells (``student_id``, ``activity_type``,
+    ``activity_name``, ``score``) into the same mapping as :func:`parse_grid`.
+    A cleared cell maps to ``None``.
+    """
+    cells = {}
+    for change in changes:
+        student_id = change.get('student_id')
+        activity_type = change.get('activity_type')
+        activity_name = change.get('activity_name')
+        if not student_id or not activity_name or activity_type not in ACTIVITY_TYPES:
+            raise InvalidScore(f'Invalid cell {change!r}')
+        score = change.get('score')
+        cells[(str(student_id), activity_type, activity_name)] = (
+            None if score in EMPTY_SCORES else parse_score(score, student_id, activity_name)
+        )
+    return cells
+
+
+def get_enrollment_map(enrolled_class, student_ids):
+    """Map student ids to ``(enrollment_id, student pk)`` for a class in one query."""
+    enrollments = {}
+    rows = Enrollment.objects.filter(
+        enrolled_class=enrolled_class,
+        student__student_id__in=student_ids,
+    ).order_by('id').values_list('student__student_id', 'id', 'student_id')
+    for student_id, enrollment_id, student_pk in rows:
+        enrollments.setdefault(student_id, (enrollment_id, student_pk))
+    return enrollments
+
+
+def apply_cells(enrolled_class, faculty, cells):
+    """
+    Write parsed cells with a fixed number of statements: the version bump,
+    one lookup for the enrollments, one for the existing records, then batched
+    inserts and updates inside a single transaction. Every written record is
+    stamped with the new class record version.
+
+    Returns the new ``version`` and counts of ``inserted``, ``updated``,
+    ``unchanged`` and ``skipped`` (cells of students not enrolled in the class) cells.
+    """
+    student_ids = {student_id for student_id, _, _ in cells}
+    activity_types = {activity_type for _, activity_type, _ in cells}
+    result = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+
+    with transaction.atomic():
+        version = Class.bump_record_version(enrolled_class.pk)
+        enrollments = get_enrollment_map(enrolled_class, student_ids)
+        enrollment_ids = [enrollment_id for enrollment_id, _ in enrollments.values()]
+
+        existing = {
+            (record.enrollment_id, record.activity_type, record.activity_name): record
+            for record in ActivityRecord.objects.select_for_update().filter(
+                enrollment_id__in=enrollment_ids,
+                activity_type__in=activity_types,
+            )
+        }
+
+        today = date.today()
+        to_create = []
+        to_update = []
+        for (student_id, activity_type, activity_name), score in cells.items():
+            if student_id not in enrollments:
+                result['skipped'] += 1
+                continue
+            enrollment_id, student_pk = enrollments[student_id]
+            record = existing.get((enrollment_id, activity_type, activity_name))
+            if record is None:
+                if score is None:
+                    result['unchanged'] += 1
+                    continue
+                to_create.append(ActivityRecord(
+                    enrollment_id=enrollment_id,
+                    student_id=student_pk,
+                    activity_type=activity_type,
+                    activity_name=activity_name,
+                    faculty=faculty,
+                    score=score,
+                    date=today,
+                    version=version,
+                ))
+            elif record.score != score:
+                record.score = score
+                record.faculty = faculty
+                record.date = today
+                record.version = version
+                to_update.append(record)
+            else:
+                result['unchanged'] += 1
+
+        ActivityRecord.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        ActivityRecord.objects.bulk_update(to_update, ['score', 'faculty', 'date', 'version'], batch_size=BATCH_SIZE)
+        result['inserted'] = len(to_create)
+        result['updated'] = len(to_update)
+
+        # Bulk writes skip the ActivityRecord signals, so refresh the summaries here.
+        touched = {record.enrollment_id for record in to_create + to_update}
+        if touched:
+            transaction.on_commit(lambda: refresh_grade_summaries(touched, activity_types))
+
+    result['version'] = version
+    return result
+
+
+def save_grid(enrolled_class, faculty, students):
+    """Save a whole posted class record grid. See :func:`apply_cells`."""
+    return apply_cells(enrolled_class, faculty, parse_grid(students))
+
+
+def save_changes(enrolled_class, faculty, changes, client_version):
+    """
+    Apply only the changed cells of a class record and return, alongside the
+    :func:`apply_cells` counts, the cells other saves have written since
+    ``client_version`` as ``remote_changes``.
+    """
+    with transaction.atomic():
+        result = apply_cells(enrolled_class, faculty, parse_changes(changes))
+        remote = ActivityRecord.objects.filter(
+            enrollment__enrolled_class=enrolled_class,
+            version__gt=client_version,
+            version__lt=result['version'],
+        ).values_list('enrollment__student__student_id', 'activity_type', 'activity_name', 'score')
+        result['remote_changes'] = [
+            {'student_id': student_id, 'activity_type': activity_type, 'activity_name': activity_name, 'score': score}
+            for student_id, activity_type, activity_name, score in remote
+        ]
+    return result
@@ -0,0 +1,91 @@
+from collections import defaultdict
+
+from core.models import Enrollment, ActivityRecord
+from class_record.grading import compute_grades, empty_grades
+
+ACTIVITY_ORDER_MAIN = ['Quiz', 'Seatwork', 'Assignment', 'Laboratory']
+ACTIVITY_ORDER_FINAL = ['Prelim', 'Midterm', 'Pre-Final', 'Final']
+
+MAIN_SLOTS = 5
+FINAL_SLOTS = 4
+
+
+def pad_scores(scores, length=MAIN_SLOTS):
+    """Pad (or trim) a list of score values to exactly ``length`` cells."""
+    score_values = list(scores[:length])
+    while len(score_values) < length:
+        score_values.append("")
+    return score_values
+
+
+def get_class_enrollments(class_obj, student_id=None):
+    """Enrollments of a class with their students, in class record row order."""
+    enrollments = Enrollment.objects.filter(
+        enrolled_class=class_obj,
+        student__isnull=False,
+    ).select_related('student')
+    if student_id is not None:
+        enrollments = enrollments.filter(student__student_id=student_id)
+    return enrollments.order_by('student__last_name', 'student__first_name', 'student__middle_name')
+
+
+def get_activity_records(class_obj):
+    """
+    Fetch every activity score of a class in one query as
+    ``(enrollment_id, activity_type, score, perfect_score)`` tuples in record id order.
+    """
+    records = ActivityRecord.objects.filter(enrollment__enrolled_class=class_obj)
+    return list(records.order_by('id').values_list(
+        'enrollment_id', 'activity_type', 'score', 'perfect_score'
+    ))
+
+
+def group_scores_by_enrollment(records):
+    """Group records as ``{enrollment_id: {activity_type: [score, ...]}}``."""
+    scores = defaultdict(lambda: defaultdict(list))
+    for enrollment_id, activity_type, score, _ in records:
+        scores[enrollment_id][activity_type].append(score)
+    return scores
+
+
+def build_student_row(student, type_map):
+    """Lay out one student's scores in the Handsontable column order."""
+    row = [
+        student.student_id,
+        f"{student.last_name}, {student.first_name} {student.middle_name}"
+    ]
+
+    for atype in ACTIVITY_ORDER_MAIN:
+        row.extend(pad_scores(type_map.get(atype, [])))
+
+    combined_final_scores = []
+    for atype in ACTIVITY_ORDER_FINAL:
+        combined_final_scores.extend(type_map.get(atype, []))
+    row.extend(pad_scores(combined_final_scores, FINAL_SLOTS))
+
+    return row
+
+
+def build_gradebook(class_obj, student_id=None, weights=None):
+    """
+    Build the class record rows for a class in a constant number of queries:
+    one for the roster and one for all of its activity records. Each row ends
+    with the computed midterm grade, final grade and remarks.
+
+    Pass ``student_id`` to restrict the gradebook to a single student's row.
+    Grades are still weighed against the whole class, so a student sees the
+    same grade the faculty does.
+    """
+    enrollments = list(get_class_enrollments(class_obj, student_id))
+    if not enrollments:
+        return []
+
+    records = get_activity_records(class_obj)
+    scores = group_scores_by_enrollment(records)
+    grades = compute_grades(records, weights)
+
+    return [
+        build_student_row(enrollment.student, scores.get(enrollment.id, {}))
+        + list(grades.get(enrollment.id, empty_grades()))
+        for enrollment in enrollments
+    ]
@@ -0,0 +1,140 @@
+import numpy as np
+from django.conf import settings
+
+CATEGORIES = ['Quiz', 'Seatwork', 'Assignment', 'Laboratory', 'Prelim', 'Midterm', 'Pre-Final', 'Final']
+
+# Weight of each category in the midterm and final grade. Override with
+# CLASS_RECORD_GRADE_WEIGHTS in settings; each term's weights should add up to 1.
+DEFAULT_GRADE_WEIGHTS = {
+    'midterm': {
+        'Quiz': 0.15,
+        'Seatwork': 0.10,
+        'Assignment': 0.10,
+        'Laboratory': 0.15,
+        'Prelim': 0.20,
+        'Midterm': 0.30,
+    },
+    'final': {
+        'Quiz': 0.15,
+        'Seatwork': 0.10,
+        'Assignment': 0.10,
+        'Laboratory': 0.15,
+        'Pre-Final': 0.20,
+        'Final': 0.30,
+    },
+}
+
+# Lower bound of each percentage band and its grade point, best first.
+# Anything below the last band is a failing 5.0.
+GRADE_SCALE = [
+    (97, 1.0),
+    (94, 1.25),
+    (91, 1.5),
+    (88, 1.75),
+    (85, 2.0),
+    (82, 2.25),
+    (79, 2.5),
+    (76, 2.75),
+    (75, 3.0),
+]
+FAILING_GRADE = 5.0
+PASSING_GRADE = 3.0
+
+_SCALE_CUTOFFS = np.array([cutoff for cutoff, _ in reversed(GRADE_SCALE)], dtype=float)
+_SCALE_POINTS = np.array([FAILING_GRADE] + [point for _, point in reversed(GRADE_SCALE)])
+
+
+def get_grade_weights():
+    return getattr(settings, 'CLASS_RECORD_GRADE_WEIGHTS', DEFAULT_GRADE_WEIGHTS)
+
+
+def weight_vector(term_weights):
+    return np.array([term_weights.get(category, 0.0) for category in CATEGORIES], dtype=float)
+
+
+def category_percentages(records):
+    """
+    Turn ``(enrollment_id, activity_type, score, perfect_score)`` records into a
+    score matrix of percentages, one row per enrollment and one column per category.
+
+    Returns ``(enrollment_ids, percentages, has_category)`` where ``has_category``
+    marks the categories the class has at least one scored activity in. Unscored
+    cells (``score is None``) add to neither the score nor the perfect score, but
+    a student with no scored activity in a category is at 0% for it. Enrollments
+    without any scored activity are left out of ``enrollment_ids``.
+    """
+    if not records:
+        return np.array([]), np.zeros((0, len(CATEGORIES))), np.zeros(len(CATEGORIES), dtype=bool)
+
+    enrollment_col, type_col, score_col, perfect_col = zip(*records)
+    scores = np.array(score_col, dtype=float)
+    perfect = np.array(perfect_col, dtype=float)
+    types, type_rows = np.unique(np.array(type_col), return_inverse=True)
+    type_to_col = np.array([CATEGORIES.index(t) if t in CATEGORIES else -1 for t in types], dtype=np.intp)
+    cols = type_to_col[type_rows]
+
+    scored = ~np.isnan(scores) & (cols >= 0)
+    enrollment_ids, rows = np.unique(np.array(enrollment_col)[scored], return_inverse=True)
+    cols, scores, perfect = cols[scored], scores[scored], perfect[scored]
+
+    shape = (len(enrollment_ids), len(CATEGORIES))
+    cells = rows * len(CATEGORIES) + cols
+    size = shape[0] * shape[1]
+    earned = np.bincount(cells, weights=scores, minlength=size).reshape(shape)
+    possible = np.bincount(cells, weights=perfect, minlength=size).reshape(shape)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentages = np.where(possible > 0, earned / possible * 100, 0.0)
+    has_category = possible.sum(axis=0) > 0
+    return enrollment_ids, percentages, has_category
+
+
+def weighted_average(percentages, has_category, weights):
+    """
+    Weighted average of each row, spreading the weight of categories the class
+    has not used yet over the ones it has.
+    """
+    weights = np.where(has_category, weights, 0.0)
+    total = weights.sum()
+    if total == 0:
+        return np.zeros(len(percentages))
+    return percentages @ (weights / total)
+
+
+def transmute(percentages):
+    """Map percentages onto the 1.0-5.0 grade point scale."""
+    return _SCALE_POINTS[np.searchsorted(_SCALE_CUTOFFS, percentages, side='right')]
+
+
+def compute_grades(records, weights=None):
+    """
+    Compute the midterm grade, final grade and remarks of every enrollment in
+    one pass over a class's score matrix.
+
+    Returns ``{enrollment_id: (midterm_grade, final_grade, remarks)}``. The final
+    grade averages the midterm standing with the final-term standing. Only the
+    categories the class has not used yet are left out of the weights; a student
+    missing every score of a used category gets 0% for it. Enrollments without
+    any scored activity are not returned; they get :func:`empty_grades`.
+    """
+    weights = weights or get_grade_weights()
+    enrollment_ids, percentages, has_category = category_percentages(records)
+    if not len(enrollment_ids):
+        return {}
+
+    midterm = weighted_average(percentages, has_category, weight_vector(weights['midterm']))
+    final_term = weighted_average(percentages, has_category, weight_vector(weights['final']))
+
+    midterm_grades = transmute(midterm)
+    final_grades = transmute((midterm + final_term) / 2)
+    remarks = np.where(final_grades <= PASSING_GRADE, 'Passed', 'Failed')
+
+    return {
+        enrollment_id.item(): (f"{mg:.2f}", f"{fg:.2f}", str(remark))
+        for enrollment_id, mg, fg, remark in zip(enrollment_ids, midterm_grades, final_grades, remarks)
+    }
+
+
+def empty_grades():
+    """The failing grades of an enrollment without any scored activity."""
+    return (f"{FAILING_GRADE:.2f}", f"{FAILING_GRADE:.2f}", 'Failed')
@@ -0,0 +1,122 @@
+import openpyxl
+from django.db import transaction
+
+from core.models import Student, ClassListImport, ClassListImportRow
+
+REQUIRED_COLUMNS = ['student_id', 'first_name', 'middle_name', 'last_name', 'course', 'year']
+
+BATCH_SIZE = 500
+
+# Over-long cells would fail the whole batch insert on a strict database.
+MAX_LENGTHS = {column: ClassListImportRow._meta.get_field(column).max_length for column in REQUIRED_COLUMNS}
+
+
+class InvalidClassList(ValueError):
+    pass
+
+
+def cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_class_list(excel_file):
+    """
+    Yield the rows of an uploaded class list as dicts keyed by REQUIRED_COLUMNS.
+    The workbook is opened in read-only mode so rows are streamed from the
+    file instead of loaded into memory all at once.
+    """
+    workbook = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [cell_text(value).lower() for value in next(rows, ())]
+        missing = [column for column in REQUIRED_COLUMNS if column not in header]
+        if missing:
+            raise InvalidClassList(
+                'Excel file must contain columns: ' + ', '.join(REQUIRED_COLUMNS)
+            )
+        positions = {column: header.index(column) for column in REQUIRED_COLUMNS}
+
+        for values in rows:
+            row = {
+                column: cell_text(values[position]) if position < len(values) else ''
+                for column, position in positions.items()
+            }
+            if row['student_id']:
+                yield row
+    finally:
+        workbook.close()
+
+
+def fit_row(row):
+    """
+    ``row`` with its cells cut to their column's max length, or None when the
+    student id is too long to be one (it could only match the wrong student).
+    """
+    if len(row['student_id']) > MAX_LENGTHS['student_id']:
+        return None
+    return {column: value[:MAX_LENGTHS[column]] for column, value in row.items()}
+
+
+def stage_batch(job, batch, start):
+    """Match one batch of rows against existing students and stage it."""
+    matches = {
+        student.student_id: student
+        for student in Student.objects.filter(student_id__in=[row['student_id'] for row in batch])
+    }
+    staged = []
+    for offset, row in enumerate(batch):
+        student = matches.get(row['student_id'])
+        if student:
+            # Show what is already on file for students that exist.
+            row = {
+                'student_id': student.student_id,
+                'first_name': student.first_name,
+                'middle_name': student.middle_name,
+                'last_name': student.last_name,
+                'course': student.course or '',
+                'year': student.year or '',
+            }
+        staged.append(ClassListImportRow(job=job, row_number=start + offset, matched_student=student, **row))
+    ClassListImportRow.objects.bulk_create(staged)
+    return sum(1 for row in staged if row.matched_student)
+
+
+def stage_class_list(excel_file, class_obj, faculty=None):
+    """
+    Stream an uploaded class list into a new ClassListImport job, matching
+    students in batches of BATCH_SIZE rows. Over-long cells are truncated and
+    rows with an over-long student id are skipped and counted, so one bad row
+    does not reject the upload. Raises InvalidClassList when the header is
+    missing a required column.
+    """
+    with transaction.atomic():
+        job = ClassListImport.objects.create(
+            class_obj=class_obj,
+            faculty=faculty,
+            file_name=getattr(excel_file, 'name', '')[:255],
+        )
+        total = matched = skipped = 0
+        batch = []
+        for row in read_class_list(excel_file):
+            row = fit_row(row)
+            if row is None:
+                skipped += 1
+                continue
+            batch.append(row)
+            if len(batch) == BATCH_SIZE:
+                matched += stage_batch(job, batch, total)
+                total += len(batch)
+                batch = []
+        if batch:
+            matched += stage_batch(job, batch, total)
+            total += len(batch)
+
+        job.total_rows = total
+        job.matched_rows = matched
+        job.skipped_rows = skipped
+        job.save(update_fields=['total_rows', 'matched_rows', 'skipped_rows'])
+    return job
@@ -0,0 +1,98 @@
+from django.db import transaction
+
+from analytics.snapshot import bump_version
+from core.models import Student, Enrollment
+from core.student_search import index_students
+
+# Uploaded class lists carry no e-mail, but Student.email is unique, so new
+# students get a per-id placeholder until they update their profile.
+PLACEHOLDER_EMAIL_DOMAIN = 'students.aktivklass.invalid'
+
+BATCH_SIZE = 1000
+
+STUDENT_ID_MAX_LENGTH = Student._meta.get_field('student_id').max_length
+
+
+def placeholder_email(student_id):
+    return f"{student_id}@{PLACEHOLDER_EMAIL_DOMAIN}"
+
+
+def new_student(row):
+    return Student(
+        student_id=row['student_id'],
+        first_name=row.get('first_name') or '',
+        middle_name=row.get('middle_name') or " ",
+        last_name=row.get('last_name') or '',
+        course=row.get('course') or None,
+        year=row.get('year') or None,
+        email=placeholder_email(row['student_id']),
+    )
+
+
+def commit_roster(class_obj, rows):
+    """
+    Create any missing students and enroll every row in ``class_obj`` with a
+    fixed number of statements, whatever the roster size.
+
+    ``rows`` are dicts with ``student_id``, ``first_name``, ``middle_name``,
+    ``last_name`` and optionally ``course`` and ``year``. Returns one outcome
+    per row: ``{'student_id', 'student', 'enrollment'}`` where ``student`` is
+    ``created``, ``existing``, ``duplicate`` or ``invalid`` and ``enrollment``
+    is ``created``, ``existing`` or ``None``.
+    """
+    outcomes = []
+    unique_rows = {}
+    for row in rows:
+        student_id = str(row.get('student_id') or '').strip()
+        outcome = {'student_id': student_id, 'student': None, 'enrollment': None}
+        outcomes.append(outcome)
+        if not student_id or len(student_id) > STUDENT_ID_MAX_LENGTH:
+            outcome['student'] = 'invalid'
+        elif student_id in unique_rows:
+            outcome['student'] = 'duplicate'
+        else:
+            unique_rows[student_id] = dict(row, student_id=student_id)
+
+    student_ids = list(unique_rows)
+    with transaction.atomic():
+        existing = dict(Student.objects.filter(student_id__in=student_ids).values_list('student_id', 'id'))
+        missing = [new_student(unique_rows[sid]) for sid in student_ids if sid not in existing]
+        Student.objects.bulk_create(missing, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+        # ignore_conflicts leaves primary keys unset, so read them back.
+        student_pks = dict(existing)
+        if missing:
+            created = dict(Student.objects.filter(
+                student_id__in=[student.student_id for student in missing]
+            ).values_list('student_id', 'id'))
+            student_pks.update(created)
+            # bulk_create skips the post_save signals that keep the search
+            # index and expire the analytics snapshot.
+            for student in missing:
+                student.pk = created.get(student.student_id)
+            index_students(missing)
+            transaction.on_commit(bump_version)
+
+        # Enrollment has no unique key on (student, class), so check first
+        # rather than relying on the database to skip duplicates.
+        enrolled = set(Enrollment.objects.filter(
+            enrolled_class=class_obj,
+            student_id__in=student_pks.values(),
+        ).values_list('student_id', flat=True))
+        Enrollment.objects.bulk_create(
+            [
+                Enrollment(student_id=pk, enrolled_class=class_obj)
+                for pk in set(student_pks.values()) - enrolled
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    for outcome in outcomes:
+        student_id = outcome['student_id']
+        if outcome['student'] or student_id not in student_pks:
+            outcome['student'] = outcome['student'] or 'invalid'
+            continue
+        outcome['student'] = 'existing' if student_id in existing else 'created'
+        outcome['enrollment'] = 'existing' if student_pks[student_id] in enrolled else 'created'
+    return outcomes
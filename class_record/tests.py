@@ -1,3 +1,298 @@
-from django.test import TestCase
+import json
+from datetime import date
+from io import BytesIO
 
-# Create your tests here.
+import openpyxl
+
+from django.core.cache import cache
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from analytics.snapshot import get_snapshot
+from core.models import Class, Faculty, Student, Enrollment, ActivityRecord, ClassListImport
+from class_record.bulk_save import save_changes, save_grid
+from class_record.gradebook import build_gradebook
+from class_record.imports import stage_class_list
+from class_record.roster import commit_roster
+from class_record.grading import compute_grades, transmute
+
+
+class GradebookQueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.faculty = Faculty.objects.create(
+            faculty_id='F-001', first_name='Ada', last_name='Reyes',
+            college_name='CCS', department_name='CS', email='ada@example.com',
+        )
+        self.class_obj = Class.objects.create(
+            faculty=self.faculty, subject_name='Data Structures', subject_code='CS201',
+            description='', schedule='MWF 9-10', room='R101',
+        )
+        session = self.client.session
+        session['role'] = 'faculty'
+        session['user_id'] = self.faculty.faculty_id
+        session.save()
+
+    def add_students(self, start, count):
+        for i in range(start, start + count):
+            student = Student.objects.create(
+                student_id=f'S-{i:04d}', first_name=f'First{i}', last_name=f'Last{i}',
+                email=f'student{i}@example.com',
+            )
+            enrollment = Enrollment.objects.create(student=student, enrolled_class=self.class_obj)
+            for activity_type in ('Quiz', 'Seatwork', 'Prelim'):
+                ActivityRecord.objects.create(
+                    enrollment=enrollment, student=student, date=date.today(),
+                    activity_type=activity_type, activity_name=f'{activity_type} 1', score=i,
+                )
+
+    def count_detail_queries(self):
+        url = reverse('class_record_detail', args=[self.class_obj.id])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_build_gradebook_uses_two_queries(self):
+        self.add_students(0, 5)
+        with self.assertNumQueries(2):
+            rows = build_gradebook(self.class_obj)
+        self.assertEqual(len(rows), 5)
+
+    def test_build_gradebook_row_layout(self):
+        self.add_students(0, 1)
+        row = build_gradebook(self.class_obj)[0]
+        self.assertEqual(row[0], 'S-0000')
+        # student id, name, 4 x 5 activity cells, 4 exam cells, MG, FG, remarks
+        self.assertEqual(len(row), 2 + 4 * 5 + 4 + 3)
+        self.assertEqual(row[2], 0)          # first quiz
+        self.assertEqual(row[7], 0)          # first seatwork
+        self.assertEqual(row[22], 0)         # prelim
+
+    def test_class_record_detail_query_count_is_constant(self):
+        self.add_students(0, 2)
+        self.count_detail_queries()  # counts the sidebar's pending join requests once
+        small = self.count_detail_queries()
+        self.add_students(2, 30)
+        large = self.count_detail_queries()
+        self.assertEqual(small, large)
+
+
+class SaveClassRecordsTests(TestCase):
+    def setUp(self):
+        self.faculty = Faculty.objects.create(
+            faculty_id='F-001', first_name='Ada', last_name='Reyes',
+            college_name='CCS', department_name='CS', email='ada@example.com',
+        )
+        self.class_obj = Class.objects.create(
+            faculty=self.faculty, subject_name='Data Structures', subject_code='CS201',
+            description='', schedule='MWF 9-10', room='R101',
+        )
+        for i in range(20):
+            student = Student.objects.create(
+                student_id=f'S-{i:04d}', first_name=f'First{i}', last_name=f'Last{i}',
+                email=f'student{i}@example.com',
+            )
+            Enrollment.objects.create(student=student, enrolled_class=self.class_obj)
+
+    def grid(self, score):
+        return [
+            {
+                'id_number': f'S-{i:04d}',
+                'quizzes': {'quiz 1': score, 'quiz 2': ''},
+                'seatworks': {'sw 1': 10},
+            }
+            for i in range(20)
+        ]
+
+    def test_save_grid_reports_cell_outcomes(self):
+        self.assertEqual(
+            save_grid(self.class_obj, self.faculty, self.grid(5)),
+            {'inserted': 40, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'version': 1},
+        )
+        self.assertEqual(
+            save_grid(self.class_obj, self.faculty, self.grid(7) + [{'id_number': 'S-9999', 'quizzes': {'quiz 1': 1}}]),
+            {'inserted': 0, 'updated': 20, 'unchanged': 20, 'skipped': 1, 'version': 2},
+        )
+        self.assertEqual(ActivityRecord.objects.filter(activity_name='quiz 1', score=7).count(), 20)
+
+    def test_save_grid_query_count_does_not_grow_with_roster(self):
+        # savepoint, version bump and read, enrollments, existing records, insert, release
+        with self.assertNumQueries(7):
+            save_grid(self.class_obj, self.faculty, self.grid(5))
+
+    def test_save_changes_returns_cells_saved_by_others(self):
+        save_grid(self.class_obj, self.faculty, self.grid(5))
+        other = save_changes(self.class_obj, self.faculty, [
+            {'student_id': 'S-0001', 'activity_type': 'Quiz', 'activity_name': 'quiz 1', 'score': 9},
+        ], client_version=1)
+        self.assertEqual(other['version'], 2)
+        self.assertEqual(other['remote_changes'], [])
+
+        mine = save_changes(self.class_obj, self.faculty, [
+            {'student_id': 'S-0002', 'activity_type': 'Quiz', 'activity_name': 'quiz 1', 'score': ''},
+        ], client_version=1)
+        self.assertEqual((mine['version'], mine['updated']), (3, 1))
+        self.assertEqual(mine['remote_changes'], [
+            {'student_id': 'S-0001', 'activity_type': 'Quiz', 'activity_name': 'quiz 1', 'score': 9.0},
+        ])
+
+    def test_save_changes_returns_records_saved_outside_the_grid(self):
+        save_grid(self.class_obj, self.faculty, self.grid(5))
+        record = ActivityRecord.objects.get(enrollment__student__student_id='S-0003', activity_name='quiz 1')
+        record.score = 8
+        record.save()
+        self.assertEqual(record.version, 2)
+
+        mine = save_changes(self.class_obj, self.faculty, [
+            {'student_id': 'S-0002', 'activity_type': 'Quiz', 'activity_name': 'quiz 1', 'score': 6},
+        ], client_version=1)
+        self.assertEqual(mine['remote_changes'], [
+            {'student_id': 'S-0003', 'activity_type': 'Quiz', 'activity_name': 'quiz 1', 'score': 8.0},
+        ])
+
+    def test_save_class_records_view(self):
+        session = self.client.session
+        session['role'] = 'faculty'
+        session['user_id'] = self.faculty.faculty_id
+        session.save()
+        response = self.client.post(
+            reverse('save_class_records'),
+            data=json.dumps({'class_id': self.class_obj.id, 'students': self.grid('abc')}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ActivityRecord.objects.exists())
+
+
+class ClassListImportTests(TestCase):
+    def setUp(self):
+        self.class_obj = Class.objects.create(
+            subject_name='Data Structures', subject_code='CS201',
+            description='', schedule='MWF 9-10', room='R101',
+        )
+        Student.objects.create(
+            student_id='2024-0001', first_name='Juan', last_name='Cruz', email='juan@example.com',
+        )
+
+    def workbook(self, rows, header=('Student_ID', 'First_Name', 'Middle_Name', 'Last_Name', 'Course', 'Year')):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+        content = BytesIO()
+        workbook.save(content)
+        return SimpleUploadedFile('class_list.xlsx', content.getvalue())
+
+    def test_stage_class_list_matches_students_in_batches(self):
+        rows = [('2024-0001', 'J', '', 'C', 'BSIT', 1)] + [
+            (f'2024-1{i:03d}', f'First{i}', '', f'Last{i}', 'BSCS', 2) for i in range(30)
+        ]
+        job = stage_class_list(self.workbook(rows), self.class_obj)
+        self.assertEqual((job.total_rows, job.matched_rows), (31, 1))
+        first = job.rows.first()
+        self.assertEqual((first.first_name, first.matched_student.student_id), ('Juan', '2024-0001'))
+        self.assertEqual(job.rows.last().year, '2')
+
+    def test_stage_class_list_fits_over_long_cells(self):
+        rows = [
+            ('2024-0002', 'Ana', 'M' * 60, 'Santos', 'BSIT', 1),
+            ('2024-' + '9' * 20, 'Too', '', 'Long', 'BSIT', 1),
+        ]
+        job = stage_class_list(self.workbook(rows), self.class_obj)
+        self.assertEqual((job.total_rows, job.skipped_rows), (1, 1))
+        self.assertEqual(job.rows.get().middle_name, 'M' * 50)
+
+    def test_upload_stages_rows_instead_of_session_lists(self):
+        response = self.client.post(
+            reverse('upload_class_list', args=[self.class_obj.id]),
+            {'class_list': self.workbook([('2024-0002', 'Ana', '', 'Santos', 'BSIT', 1)])},
+        )
+        self.assertEqual(response.status_code, 302)
+        job = ClassListImport.objects.get()
+        self.assertEqual(self.client.session['class_list_import_id'], job.id)
+        self.assertNotIn('uploaded_students', self.client.session)
+        self.assertContains(self.client.get(reverse('class_record_detail', args=[self.class_obj.id])), 'Santos')
+
+        self.client.post(reverse('clear_uploaded_students_session'))
+        self.assertFalse(ClassListImport.objects.exists())
+
+    def test_upload_rejects_missing_columns(self):
+        response = self.client.post(
+            reverse('upload_class_list', args=[self.class_obj.id]),
+            {'class_list': self.workbook([], header=('student_id', 'name'))},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class CommitRosterTests(TestCase):
+    def setUp(self):
+        self.class_obj = Class.objects.create(
+            subject_name='Data Structures', subject_code='CS201',
+            description='', schedule='MWF 9-10', room='R101',
+        )
+        existing = Student.objects.create(
+            student_id='2024-0001', first_name='Juan', last_name='Cruz', email='juan@example.com',
+        )
+        Enrollment.objects.create(student=existing, enrolled_class=self.class_obj)
+
+    def rows(self, count):
+        return [
+            {'student_id': f'2024-{i:04d}', 'first_name': f'First{i}', 'middle_name': '', 'last_name': f'Last{i}'}
+            for i in range(1, count + 1)
+        ]
+
+    def test_commit_roster_reports_outcomes(self):
+        outcomes = commit_roster(self.class_obj, self.rows(3) + [{'student_id': '2024-0002'}, {'student_id': ''}])
+        self.assertEqual([(o['student'], o['enrollment']) for o in outcomes], [
+            ('existing', 'existing'),
+            ('created', 'created'),
+            ('created', 'created'),
+            ('duplicate', None),
+            ('invalid', None),
+        ])
+        self.assertEqual(Enrollment.objects.filter(enrolled_class=self.class_obj).count(), 3)
+        self.assertEqual(Student.objects.get(student_id='2024-0002').middle_name, ' ')
+
+    def test_commit_roster_expires_the_analytics_snapshot(self):
+        cache.clear()
+        students_before = get_snapshot()['total_students']
+        with self.captureOnCommitCallbacks(execute=True):
+            commit_roster(self.class_obj, self.rows(3))
+        self.assertEqual(get_snapshot()['total_students'], students_before + 2)
+
+    def test_commit_roster_query_count_is_fixed(self):
+        # savepoint, existing students, insert, read back ids, replace search tokens (2),
+        # existing enrollments, insert, release
+        with self.assertNumQueries(9):
+            commit_roster(self.class_obj, self.rows(80))
+        self.assertEqual(Enrollment.objects.filter(enrolled_class=self.class_obj).count(), 80)
+
+
+class GradeComputationTests(SimpleTestCase):
+    def test_transmute_uses_band_lower_bounds(self):
+        self.assertEqual(list(transmute([100, 97, 96.9, 79, 75, 74.9])), [1.0, 1.0, 1.25, 2.5, 3.0, 5.0])
+
+    def test_compute_grades_weighs_categories(self):
+        records = [
+            (1, 'Quiz', 10, 10),
+            (1, 'Prelim', 50, 100),
+            (1, 'Midterm', 100, 100),
+            (2, 'Quiz', 5, 10),
+            (2, 'Prelim', 40, 100),
+            (2, 'Midterm', None, 100),
+        ]
+        grades = compute_grades(records)
+        # Only Quiz/Prelim/Midterm are in use: 0.15, 0.20 and 0.30 renormalised.
+        # Student 1: (100*.15 + 50*.20 + 100*.30) / .65 = 84.6 -> 2.25
+        self.assertEqual(grades[1][0], '2.25')
+        self.assertEqual(grades[1][2], 'Passed')
+        # Student 2 has no midterm score yet and fails the term.
+        self.assertEqual(grades[2], ('5.00', '5.00', 'Failed'))
+
+    def test_compute_grades_without_records(self):
+        self.assertEqual(compute_grades([]), {})
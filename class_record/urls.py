@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import class_record_detail, enroll_student, save_class_records, search_students, upload_class_list, save_uploaded_students_to_class, get_class_students, clear_uploaded_students_session
+from .views import class_record_detail, enroll_student, save_class_records, search_students, upload_class_list, save_uploaded_students_to_class, get_class_students, clear_uploaded_students_session, save_class_record_changes
 
 urlpatterns = [
     path('<int:class_id>/', class_record_detail, name='class_record_detail'),
@@ -12,4 +12,5 @@ urlpatterns = [
     path('enroll_student/', enroll_student, name='enroll_student'),
     path('class_record/<int:class_id>/<str:role>/', class_record_detail, name='class_record_detail'),
     path('save_class_records/', save_class_records, name='save_class_records'),
+    path('class/<int:class_id>/changes/', save_class_record_changes, name='save_class_record_changes'),
 ]
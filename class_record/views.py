@@ -1,102 +1,57 @@
-import pandas as pd
+from django.core.paginator import Paginator
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse
 from django.views.decorators.http import require_GET, require_POST
-from django.db.models import Q
 from django.views.decorators.csrf import csrf_exempt
-from django.db import transaction
 import json
-from collections import defaultdict
-from datetime import date, datetime
 
-from core.models import Class, Faculty, Student, Enrollment, ActivityRecord
+from core.models import Class, Faculty, Student, Enrollment, ClassListImport
+from class_record.bulk_save import InvalidScore, save_changes, save_grid
+from class_record.gradebook import build_gradebook
+from class_record.imports import InvalidClassList, stage_class_list
+from class_record.roster import commit_roster
+from core.middleware import get_principal_for
+from core.student_search import search_students as find_students
 
+IMPORT_PAGE_SIZE = 100
 
-from django.shortcuts import get_object_or_404, render
 
-def pad_scores(scores, length=5):
-        scores.sort(key=lambda x: x[0])  # sort by id
-        score_values = [s[1] for s in scores]
-        while len(score_values) < length:
-            score_values.append("")
-        return score_values[:length]
-
-def get_class_activity_scores_grouped_sorted(request, class_id, role):
-    class_obj = get_object_or_404(Class, id=class_id)
+def get_class_activity_scores_grouped_sorted(request, class_id, role, class_obj=None):
+    if class_obj is None:
+        class_obj = get_object_or_404(Class, id=class_id)
+    student_id = None
     if role == 'student':
         student_id = request.session.get('user_id')
-        enrollments = Enrollment.objects.filter(
-            enrolled_class=class_obj,
-            student__student_id=student_id
-        ).select_related('student')
-    else:
-        enrollments = Enrollment.objects.filter(
-            enrolled_class=class_obj
-        ).select_related('student').order_by('student__last_name', 'student__first_name', 'student__middle_name')
-
-    activity_order_main = ['Quiz', 'Seatwork', 'Assignment', 'Laboratory']
-    activity_order_final = ['Prelim', 'Midterm', 'Pre-Final', 'Final']
-
-    initial_data = []
-    print("enrollments:: ", enrollments)
-    for enrollment in enrollments:
-        student = enrollment.student
-        activities = ActivityRecord.objects.filter(enrollment=enrollment)
-        print("activities::: ", activities)
-        type_map = {atype: [] for atype in activity_order_main + activity_order_final}
-
-        for record in activities:
-            score_type = record.activity_type
-            if score_type in type_map:
-                type_map[score_type].append((record.id, record.score))
-
-        for atype in activity_order_main:
-            type_map[atype] = pad_scores(type_map[atype])
-
-        combined_final_scores = []
-        for atype in activity_order_final:
-            sorted_scores = sorted(type_map[atype], key=lambda x: x[0])
-            combined_final_scores.extend([score for _, score in sorted_scores])
-
-        while len(combined_final_scores) < 5:
-            combined_final_scores.append("")
-
-        combined_final_scores = combined_final_scores[:4]
-
-        student_row = [
-            student.student_id,
-            f"{student.last_name}, {student.first_name} {student.middle_name}"
-        ]
-
-        for atype in activity_order_main:
-            student_row.extend(type_map[atype])
+        if not student_id:
+            return []
 
-        student_row.extend(combined_final_scores)
-        print(combined_final_scores)
-         # TODO: Compute Midterm Grade and Final Grade. Dummy for now.
-        student_row.extend(['5.0', '5.0',"Passed"])
+    return build_gradebook(class_obj, student_id=student_id)
 
-        initial_data.append(student_row)
-        print("initial_data:::: ", initial_data)
-    return initial_data
+def get_staged_import(request, class_obj):
+    """The class list import staged by this session for the class, if any."""
+    job_id = request.session.get('class_list_import_id')
+    if not job_id:
+        return None
+    return ClassListImport.objects.filter(id=job_id, class_obj=class_obj).first()
 
 def class_record_detail(request, class_id, role='faculty'):
     class_obj = get_object_or_404(Class, id=class_id)
 
-    uploaded_students = request.session.get('uploaded_students', None)
+    initial_data = get_class_activity_scores_grouped_sorted(request, class_id, role, class_obj=class_obj)
 
-    initial_data = get_class_activity_scores_grouped_sorted(request, class_id, role)
-
-    if uploaded_students:
-        enrolled = uploaded_students.get('enrolled', [])
-        unenrolled = uploaded_students.get('unenrolled', [])
-    else:
-        enrolled = []
-        unenrolled = []
+    import_job = get_staged_import(request, class_obj) if role != 'student' else None
+    import_page = None
+    enrolled = []
+    unenrolled = []
+    if import_job:
+        import_page = Paginator(import_job.rows.all(), IMPORT_PAGE_SIZE).get_page(request.GET.get('import_page'))
+        for row in import_page:
+            (enrolled if row.matched_student_id else unenrolled).append(row)
 
     context = {
         'class': class_obj,
-        'uploaded_students': uploaded_students,
+        'import_job': import_job,
+        'import_page': import_page,
         'enrolled': enrolled,
         'unenrolled': unenrolled,
         'exams': initial_data,
@@ -111,22 +66,16 @@ def search_students(request):
     query = request.GET.get('q', '').strip()
     students = []
     if query:
-        words = query.split()
-        students_qs = Student.objects.filter(
-            Q(student_id__icontains=query) |
-            Q(first_name__icontains=query) |
-            Q(middle_name__icontains=query) |
-            Q(last_name__icontains=query)
-        )
-
-        if len(words) > 1:
-            first_name_part = words[0]
-            last_name_part = ' '.join(words[1:])
-            students_qs |= Student.objects.filter(
-                Q(first_name__icontains=first_name_part) &
-                Q(last_name__icontains=last_name_part)
-            )
-        students = list(students_qs.values('id', 'student_id', 'first_name', 'middle_name', 'last_name').distinct()[:20])
+        students = [
+            {
+                'id': student.id,
+                'student_id': student.student_id,
+                'first_name': student.first_name,
+                'middle_name': student.middle_name,
+                'last_name': student.last_name,
+            }
+            for student in find_students(query, limit=20)
+        ]
 
     # If AJAX or expects JSON, return JSON
     if request.headers.get('x-requested-with') == 'XMLHttpRequest' or request.GET.get('format') == 'json':
@@ -139,112 +88,63 @@ def search_students(request):
 
 @require_POST
 def upload_class_list(request, class_id):
+    class_obj = get_object_or_404(Class, id=class_id)
     excel_file = request.FILES.get('class_list')
     if not excel_file:
         return JsonResponse({'error': 'No file uploaded'}, status=400)
-    print ('upload_class_list')
-    try:
-        df = pd.read_excel(excel_file)
-        df.columns = df.columns.str.lower()
-
-        required_columns = {'student_id', 'first_name', 'middle_name', 'last_name', 'course', 'year'}
-        if not required_columns.issubset(df.columns):
-            return JsonResponse({
-                'error': 'Excel file must contain columns: student_id, first_name, middle_name, last_name, course, year'
-            }, status=400)
-
-        df = df[list(required_columns)].fillna('')
-        uploaded_students = df.to_dict(orient='records')
-
-        enrolled_students = []
-        unenrolled_students = []
-
-        for student in uploaded_students:
-            student_id = student.get('user_id')
-            print ('upload_class_list', student_id)
-            try:
-                existing_student = Student.objects.get(student_id=student_id)
-                enrolled_students.append({
-                    'student_id': existing_student.student_id,
-                    'first_name': existing_student.first_name,
-                    'middle_name': existing_student.middle_name,
-                    'last_name': existing_student.last_name,
-                    'course': existing_student.course,
-                    'year': existing_student.year
-                })
-                print ('upload_class_list TRY', enrolled_students)
-            except Student.DoesNotExist:
-                unenrolled_students.append({
-                    'student_id': student.get('user_id'),
-                    'first_name': student.get('first_name'),
-                    'middle_name': student.get('middle_name'),
-                    'last_name': student.get('last_name'),
-                    'course': student.get('course', ''),
-                    'year': student.get('year', '')
-                })
-                print ('upload_class_list EX', enrolled_students)
-        print('enrolled_students:: ', enrolled_students)
-        print('unenrolled_students:: ', unenrolled_students)
-        # Save both lists to session
-        request.session['uploaded_students'] = {
-            'enrolled': enrolled_students,
-            'unenrolled': unenrolled_students
-        }
-
-        request.session['enrolled'] = enrolled_students
-        request.session['unenrolled'] = unenrolled_students
 
+    try:
+        faculty = get_principal_for(request, 'faculty')
+        job = stage_class_list(excel_file, class_obj, faculty)
+    except InvalidClassList as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'error': f'Error processing file: {str(e)}'}, status=400)
-    print('===================================================================================')
+
+    discard_staged_import(request)
+    request.session['class_list_import_id'] = job.id
     return redirect('class_record_detail', class_id=class_id)
 
 
+def discard_staged_import(request):
+    job_id = request.session.pop('class_list_import_id', None)
+    if job_id:
+        ClassListImport.objects.filter(id=job_id).delete()
+    # Lists stored by the previous session-based upload.
+    for key in ('uploaded_students', 'enrolled', 'unenrolled'):
+        request.session.pop(key, None)
+
 
 @csrf_exempt
 @require_POST
 def save_uploaded_students_to_class(request, class_id):
+    class_obj = get_object_or_404(Class, id=class_id)
     try:
-        print(f"Saving students to class_id: {class_id}")
-        class_obj = get_object_or_404(Class, id=class_id)
-        print(f"Fetched class object: {class_obj.subject_name} {class_obj.subject_code} {class_id}")
-        print(f"Class object: {class_obj}, ID: {getattr(class_obj, 'id', None)}")
-        data = json.loads(request.body)
-        students_data = data.get('students', [])
-        print(f"Number of students: {len(students_data)}")
-
-        with transaction.atomic():
-            for student_data in students_data:
-                print(f"Processing student: {student_data}")
-                print(f"Processing student: {student_data['student_id']}")
-                try:
-                    student, created = Student.objects.get_or_create(
-                        student_id=student_data['student_id'],
-                        defaults={
-                            'first_name': student_data['first_name'],
-                            'middle_name': student_data['middle_name'],
-                            'last_name': student_data['last_name'],
-                            'enrolled_class': class_obj,   # <-- IMPORTANT
-                        }
-                    )
-                except Exception as e:
-                    print(f"Failed to create or get Student with student_id={student_data['student_id']}: {e}")
-                    raise
-                print(f"student: {student}")
-                enrollment, enrollment_created = Enrollment.objects.get_or_create(
-                student=student,
-                enrolled_class=class_obj
-            )
-            print(f"{'Created' if enrollment_created else 'Found'} enrollment for student {student.student_id}")
-
-        request.session.pop('uploaded_students', None)
-
-        return JsonResponse({'success': True})
+        data = json.loads(request.body or '{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid request body'}, status=400)
+
+    import_job = get_staged_import(request, class_obj)
+    if import_job:
+        rows = list(import_job.rows.values('student_id', 'first_name', 'middle_name', 'last_name', 'course', 'year'))
+    else:
+        rows = data.get('students', [])
 
+    try:
+        outcomes = commit_roster(class_obj, rows)
     except Exception as e:
-        print(f"Error saving students: {str(e)}")
         return JsonResponse({'error': str(e)}, status=400)
 
+    discard_staged_import(request)
+
+    summary = {
+        'students_created': sum(1 for o in outcomes if o['student'] == 'created'),
+        'enrollments_created': sum(1 for o in outcomes if o['enrollment'] == 'created'),
+        'already_enrolled': sum(1 for o in outcomes if o['enrollment'] == 'existing'),
+        'rejected': sum(1 for o in outcomes if o['student'] in ('invalid', 'duplicate')),
+    }
+    return JsonResponse({'success': True, 'outcomes': outcomes, **summary})
+
 
 @require_GET
 def get_class_students(request, class_id):
@@ -255,9 +155,7 @@ def get_class_students(request, class_id):
 
 @require_POST
 def clear_uploaded_students_session(request):
-    if 'uploaded_students' in request.session:
-        del request.session['uploaded_students']
-        request.session.modified = True
+    discard_staged_import(request)
     return JsonResponse({'status': 'success'})
 
 @csrf_exempt
@@ -307,11 +205,8 @@ def save_class_records(request):
         data = json.loads(request.body)
         class_id = data.get('class_id')
         students = data.get('students', [])
-        faculty_id = request.session.get('user_id')
-
-        try:
-            faculty = Faculty.objects.get(faculty_id=faculty_id)
-        except Faculty.DoesNotExist:
+        faculty = get_principal_for(request, 'faculty')
+        if not faculty:
             print('Faculty not found')
             return JsonResponse({'error': 'Faculty not found'}, status=404)
 
@@ -319,66 +214,37 @@ def save_class_records(request):
             enrolled_class = Class.objects.get(id=class_id)
         except Class.DoesNotExist:
             return JsonResponse({'success': False, 'error': 'Class not found'})
-        print('students::: ', students)
-
-        for record in students:
-            student_id = record.get('id_number')
-            print('student_id:: ', student_id)
-            print('record:: ', record)
-            try:
-                student = Student.objects.get(student_id=student_id)
-                enrollment = Enrollment.objects.get(student=student, enrolled_class=enrolled_class)
-            except (Student.DoesNotExist, Enrollment.DoesNotExist):
-                continue  # Skip if student or enrollment not found
-
-            # Save activity records (Quizzes, Assignments, Seatworks, Laboratory Works)
-            for category, type_name in [
-                ('quizzes', 'Quiz'),
-                ('assignments', 'Assignment'),
-                ('seatworks', 'Seatwork'),
-                ('laboratory_works', 'Laboratory')
-            ]:
-                activities = record.get(category, {})
-                print('activities::', activities)
-                for activity_name, score in activities.items():
-                    if score not in [None, '', 'null']:
-                        ActivityRecord.objects.update_or_create(
-                            enrollment=enrollment,
-                            activity_type=type_name,
-                            activity_name=activity_name,
-                            faculty=faculty,
-                            defaults={
-                                'score': float(score),
-                                'date': date.today()
-                            }
-                        )
-
-            # # Save major exam scores (PE, ME, PFE, FE, MG, FG)
-            # for key, type_name in [
-            #     ('pe', 'Prelim'),
-            #     ('me', 'Midterm'),
-            #     ('pfe', 'Pre-Final'),
-            #     ('fe', 'Final'),
-            #     ('mg', 'Midterm'),  # Optional: rename or handle separately
-            #     ('fg', 'Final')     # Optional: rename or handle separately
-            # ]:
-            #     score = record.get(key)
-            #     if score not in [None, '', 'null']:
-            #         ActivityRecord.objects.update_or_create(
-            #             enrollment=enrollment,
-            #             activity_type=type_name,
-            #             activity_name=type_name,  # Or use f"{type_name} Grade" if you want to clarify
-            #             faculty=faculty,
-            #             defaults={
-            #                 'score': float(score),
-            #                 'date': date.today()
-            #             }
-            #         )
-
-
-            # Remarks - if needed, store it in a separate model or Enrollment
-            # Here's an example assuming you want to add remarks as text somewhere:
-            # enrollment.remarks = record.get('remarks', '')
-            # enrollment.save()
-
-        return JsonResponse({'success': True})
+
+        try:
+            result = save_grid(enrolled_class, faculty, students)
+        except InvalidScore as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+        return JsonResponse({'success': True, **result})
+
+
+@require_POST
+def save_class_record_changes(request, class_id):
+    """
+    Delta save for the class record grid: applies only the changed cells and
+    returns the new record version plus cells saved by others since the
+    client's version.
+    """
+    try:
+        data = json.loads(request.body)
+        client_version = int(data.get('version', 0))
+    except (ValueError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Invalid request body'}, status=400)
+
+    faculty = get_principal_for(request, 'faculty')
+    if not faculty:
+        return JsonResponse({'error': 'Faculty not found'}, status=404)
+
+    enrolled_class = get_object_or_404(Class, id=class_id)
+
+    try:
+        result = save_changes(enrolled_class, faculty, data.get('changes', []), client_version)
+    except InvalidScore as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({'success': True, **result})
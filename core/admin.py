@@ -6,7 +6,7 @@ from django.contrib import admin
 from .models import (
     Class, Student, StudentProfile, Faculty, ClassJoinRequest, Enrollment, 
     ActivityRecord, Notification, Conversation, Message, AdminUser, 
-    Attendance, PasswordResetToken, Post, Comment, 
+    Attendance, PasswordResetToken, Post, Comment, GradeSummary,
     FacultyProfile, Quiz, QuizQuestion, QuizChoice, QuizAttempt, QuizResponse, QuizGrade
 )
 
@@ -69,6 +69,12 @@ class QuizGradeAdmin(admin.ModelAdmin):
     search_fields = ['student__first_name', 'student__last_name', 'quiz__title']
     ordering = ['-graded_at']
 
+@admin.register(GradeSummary)
+class GradeSummaryAdmin(admin.ModelAdmin):
+    list_display = ['enrollment', 'activity_type', 'score_total', 'perfect_score_total', 'record_count', 'updated_at']
+    list_filter = ['activity_type', 'enrollment__enrolled_class']
+    search_fields = ['enrollment__student__first_name', 'enrollment__student__last_name']
+
 # Register other models
 admin.site.register(StudentProfile)
 admin.site.register(ClassJoinRequest)
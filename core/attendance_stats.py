@@ -0,0 +1,46 @@
+from django.db.models import Count, Q
+
+from core.models import Attendance, Class
+
+
+def attendance_by_class(student, class_obj=None):
+    """
+    Per-class attendance totals for a student, counted in one grouped query:
+    ``{class_id: {'class': Class, 'total', 'present', 'absent', 'late'}}``.
+    ``class`` carries only the fields needed to label the class.
+    """
+    records = Attendance.objects.filter(student=student)
+    if class_obj is not None:
+        records = records.filter(class_obj=class_obj)
+
+    rows = records.values(
+        'class_obj_id', 'class_obj__subject_name', 'class_obj__subject_code', 'class_obj__class_code',
+    ).annotate(
+        total=Count('id'),
+        present=Count('id', filter=Q(status='Present')),
+        absent=Count('id', filter=Q(status='Absent')),
+        late=Count('id', filter=Q(status='Late')),
+    ).order_by('class_obj__subject_name', 'class_obj_id')
+
+    return {
+        row['class_obj_id']: {
+            'class': Class(
+                id=row['class_obj_id'],
+                subject_name=row['class_obj__subject_name'],
+                subject_code=row['class_obj__subject_code'],
+                class_code=row['class_obj__class_code'],
+            ),
+            'total': row['total'],
+            'present': row['present'],
+            'absent': row['absent'],
+            'late': row['late'],
+        }
+        for row in rows
+    }
+
+
+def attendance_totals(stats):
+    """Totals over the classes of an ``attendance_by_class`` result, plus the present rate in percent."""
+    totals = {key: sum(stat[key] for stat in stats.values()) for key in ('total', 'present', 'absent', 'late')}
+    totals['rate'] = round(totals['present'] / totals['total'] * 100, 1) if totals['total'] else 0
+    return totals
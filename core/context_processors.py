@@ -1,6 +1,9 @@
 from django.db import ProgrammingError
+from django.utils.functional import SimpleLazyObject
 from faculty_profile.views import MockFacultyProfile
 from core.models import FacultyProfile
+from core.join_request_counts import get_pending_count
+from core.middleware import get_principal, get_principal_for
 
 def user_context_processor(request):
     """
@@ -36,62 +39,52 @@ def user_context_processor(request):
         return context
 
     try:
-        if role == 'student':
-            from core.models import Student
-            user = Student.objects.select_related('profile').filter(student_id=user_id).first()
-            if user:
-                context.update({
-                    'fullname': f"{user.first_name} {user.last_name}",
-                    'email': user.email,
-                    'role': 'student',
-                    'avatar_url': user.profile.avatar.url if hasattr(user, 'profile') and user.profile.avatar else None
-                })
-        elif role == 'admin':
-            from core.models import AdminUser
-            user = AdminUser.objects.filter(employee_id=user_id).first()
-            if user:
-                context.update({
-                    'fullname': f"{user.first_name} {user.last_name}",
-                    'email': user.email,
-                    'role': 'admin',
-                })
-        elif role == 'faculty':
-            # This is where we handle the faculty case, including the mock profile
-            try:
-                from core.models import Faculty
-                user = Faculty.objects.filter(faculty_id=user_id).first()
-                if user:
-                    context.update({
-                        'fullname': f"{user.first_name} {user.last_name}",
-                        'email': user.email,
-                        'role': 'faculty',
-                        # 'avatar_url': user.facultyprofile.profile_picture.url if hasattr(user, 'facultyprofile') and user.facultyprofile.profile_picture else None
-                    })
-            except (ProgrammingError, AttributeError):
-                # If database table doesn't exist, use default faculty info
-                context.update({
-                    'fullname': f"Faculty User",
-                    'email': f"{user_id}@cit.edu",
-                    'role': 'faculty',
-                })
+        user = get_principal(request)
     except ProgrammingError:
-        # This is a fallback for other roles if their tables don't exist yet.
-        pass
+        # This is a fallback for roles whose tables don't exist yet.
+        if role == 'faculty':
+            context.update({
+                'fullname': f"Faculty User",
+                'email': f"{user_id}@cit.edu",
+                'role': 'faculty',
+            })
+        return context
+
+    if user:
+        context.update({
+            'fullname': f"{user.first_name} {user.last_name}",
+            'email': user.email,
+            'role': role,
+        })
+        if role == 'faculty':
+            context['pending_join_requests_count'] = get_pending_count(user.faculty_id)
+        if role == 'student':
+            # The principal is loaded with select_related('profile').
+            context['avatar_url'] = user.profile.avatar.url if hasattr(user, 'profile') and user.profile.avatar else None
 
     return context 
 
+def get_sidebar_profile(request):
+    """
+    The FacultyProfile of the logged-in faculty, found by the request's
+    principal like the profile page does, and looked up at most once per request.
+    """
+    if not hasattr(request, '_cached_sidebar_profile'):
+        profile = None
+        faculty = get_principal_for(request, 'faculty')
+        if faculty is not None:
+            profile = FacultyProfile.objects.filter(faculty_id=faculty.faculty_id).first()
+        elif 'mock_profile' in request.session:
+            # For mock mode, use a simple object for template compatibility
+            class SessionProfile:
+                pass
+            profile = SessionProfile()
+            for k, v in request.session['mock_profile'].items():
+                setattr(profile, k, v)
+        request._cached_sidebar_profile = profile
+    return request._cached_sidebar_profile
+
+
 def user_profile_context(request):
-    profile = None
-    if request.user.is_authenticated:
-        try:
-            profile = FacultyProfile.objects.get(user=request.user)
-        except FacultyProfile.DoesNotExist:
-            profile = None
-    elif 'mock_profile' in request.session:
-        # For mock mode, use a simple object for template compatibility
-        class SessionProfile:
-            pass
-        profile = SessionProfile()
-        for k, v in request.session['mock_profile'].items():
-            setattr(profile, k, v)
-    return {'sidebar_profile': profile} 
\ No newline at end of file
+    # Lazy, so pages that never show the profile don't query for it.
+    return {'sidebar_profile': SimpleLazyObject(lambda: get_sidebar_profile(request))}
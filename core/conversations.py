@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+
+from core.models import Conversation, ConversationParticipant, Message
+
+PREVIEW_LENGTH = Conversation._meta.get_field('last_message_preview').max_length
+
+
+def preview(content):
+    return content[:PREVIEW_LENGTH]
+
+
+def post_message(conversation, sender, content):
+    """
+    Create a message and, in the same transaction, move the conversation's
+    last message forward and bump every other participant's unread count.
+    """
+    with transaction.atomic():
+        message = Message.objects.create(conversation=conversation, sender=sender, content=content)
+        Conversation.objects.filter(pk=conversation.pk).update(
+            last_message_at=message.timestamp,
+            last_message_preview=preview(content),
+            last_message_sender=sender,
+        )
+        ConversationParticipant.objects.filter(conversation=conversation).exclude(student=sender).update(
+            unread_count=F('unread_count') + 1,
+        )
+    return message
+
+
+def mark_read(conversation, student):
+    """Mark the messages ``student`` received in ``conversation`` as read and reset their counter."""
+    with transaction.atomic():
+        updated = conversation.messages.filter(is_read=False).exclude(sender=student).update(is_read=True)
+        ConversationParticipant.objects.filter(conversation=conversation, student=student).update(unread_count=0)
+    return updated
+
+
+def rebuild_conversation_state(conversation_ids):
+    """Recompute the last message and unread counters of some conversations from their messages."""
+    conversation_ids = set(conversation_ids)
+    if not conversation_ids:
+        return
+
+    last_message = Message.objects.filter(conversation=OuterRef('pk')).order_by('-timestamp', '-id')
+    conversations = list(Conversation.objects.filter(id__in=conversation_ids).annotate(
+        latest_at=Subquery(last_message.values('timestamp')[:1]),
+        latest_sender_id=Subquery(last_message.values('sender_id')[:1]),
+        latest_content=Subquery(last_message.values('content')[:1]),
+    ))
+    for conversation in conversations:
+        conversation.last_message_at = conversation.latest_at
+        conversation.last_message_sender_id = conversation.latest_sender_id
+        conversation.last_message_preview = preview(conversation.latest_content or '')
+    Conversation.objects.bulk_update(
+        conversations, ['last_message_at', 'last_message_sender', 'last_message_preview'], batch_size=500,
+    )
+
+    participants = list(
+        ConversationParticipant.objects.filter(conversation_id__in=conversation_ids).annotate(
+            unread=Count(
+                'conversation__messages',
+                filter=Q(conversation__messages__is_read=False) & ~Q(conversation__messages__sender=F('student')),
+            ),
+        )
+    )
+    for participant in participants:
+        participant.unread_count = participant.unread
+    ConversationParticipant.objects.bulk_update(participants, ['unread_count'], batch_size=500)
@@ -0,0 +1,14 @@
+from django.db import connections, router
+
+
+def upsert_kwargs(model, unique_fields, update_fields):
+    """
+    Keyword arguments that turn ``bulk_create`` into an upsert on the model's
+    database. MySQL resolves conflicts on any unique key and rejects
+    ``unique_fields``, while SQLite and PostgreSQL require it.
+    """
+    connection = connections[router.db_for_write(model)]
+    kwargs = {'update_conflicts': True, 'update_fields': update_fields}
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs['unique_fields'] = unique_fields
+    return kwargs
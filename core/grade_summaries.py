@@ -0,0 +1,81 @@
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Sum
+from django.utils import timezone
+
+from core.db_utils import upsert_kwargs
+from core.models import ActivityRecord, GradeSummary
+
+SUMMARY_FIELDS = ['score_total', 'perfect_score_total', 'percentage_total', 'record_count', 'updated_at']
+
+# Only records that can be turned into a percentage count towards a summary.
+SCORED_RECORDS = Q(score__isnull=False, perfect_score__gt=0)
+
+
+def summarize(records):
+    """Group scored activity records into per (enrollment, activity_type) totals."""
+    return records.filter(SCORED_RECORDS).values('enrollment_id', 'activity_type').annotate(
+        score_total=Sum('score'),
+        perfect_score_total=Sum('perfect_score'),
+        percentage_total=Sum(ExpressionWrapper(
+            F('score') * 100.0 / F('perfect_score'), output_field=FloatField()
+        )),
+        record_count=Count('id'),
+    )
+
+
+def refresh_grade_summaries(enrollment_ids, activity_types=None):
+    """
+    Recompute the summaries of the given enrollments (optionally only some
+    activity types) from their activity records. Summaries left without any
+    scored record are deleted.
+    """
+    enrollment_ids = set(enrollment_ids)
+    if not enrollment_ids:
+        return
+
+    records = ActivityRecord.objects.filter(enrollment_id__in=enrollment_ids)
+    summaries = GradeSummary.objects.filter(enrollment_id__in=enrollment_ids)
+    if activity_types is not None:
+        records = records.filter(activity_type__in=activity_types)
+        summaries = summaries.filter(activity_type__in=activity_types)
+
+    totals = {(row['enrollment_id'], row['activity_type']): row for row in summarize(records)}
+
+    stale = [pk for pk, *key in summaries.values_list('pk', 'enrollment_id', 'activity_type') if tuple(key) not in totals]
+    if stale:
+        GradeSummary.objects.filter(pk__in=stale).delete()
+
+    now = timezone.now()
+    rows = [
+        GradeSummary(
+            enrollment_id=enrollment_id,
+            activity_type=activity_type,
+            score_total=row['score_total'],
+            perfect_score_total=row['perfect_score_total'],
+            percentage_total=row['percentage_total'],
+            record_count=row['record_count'],
+            updated_at=now,
+        )
+        for (enrollment_id, activity_type), row in totals.items()
+    ]
+    GradeSummary.objects.bulk_create(
+        rows, **upsert_kwargs(GradeSummary, ['enrollment', 'activity_type'], SUMMARY_FIELDS)
+    )
+
+
+def refresh_grade_summary(enrollment_id, activity_type):
+    refresh_grade_summaries([enrollment_id], [activity_type])
+
+
+def student_subject_averages(student):
+    """
+    Per-class averages for a student read from the summary table:
+    ``{class_id: {'class': Class, 'percentage_total': ..., 'record_count': ...}}``.
+    """
+    subjects = {}
+    summaries = GradeSummary.objects.filter(enrollment__student=student).select_related('enrollment__enrolled_class')
+    for summary in summaries:
+        class_obj = summary.enrollment.enrolled_class
+        subject = subjects.setdefault(class_obj.id, {'class': class_obj, 'percentage_total': 0, 'record_count': 0})
+        subject['percentage_total'] += summary.percentage_total
+        subject['record_count'] += summary.record_count
+    return subjects
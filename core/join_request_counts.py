@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from core.models import ClassJoinRequest
+
+# Counts are rebuilt from the database when missing, so an expiry bounds how
+# long a drifted counter (e.g. after a cache restart mid-update) can last.
+PENDING_COUNT_TIMEOUT = 60 * 60
+
+
+def get_cache():
+    return caches[getattr(settings, 'JOIN_REQUEST_COUNT_CACHE', 'default')]
+
+
+def pending_count_key(faculty_id):
+    return f'join_requests.pending.{faculty_id}'
+
+
+def count_pending(faculty_id):
+    return ClassJoinRequest.objects.filter(class_requested__faculty_id=faculty_id, status='pending').count()
+
+
+def get_pending_count(faculty_id):
+    """Pending join requests for the classes of ``faculty_id``, counted once and then kept by signals."""
+    cache = get_cache()
+    key = pending_count_key(faculty_id)
+    count = cache.get(key)
+    if count is None:
+        count = count_pending(faculty_id)
+        cache.add(key, count, PENDING_COUNT_TIMEOUT)
+    return max(count, 0)
+
+
+def adjust_pending_count(faculty_id, delta):
+    """
+    Move the cached counter of ``faculty_id`` by ``delta``. A counter that
+    is not cached is left alone; it is counted afresh on the next read.
+    """
+    if not faculty_id or not delta:
+        return
+    try:
+        get_cache().incr(pending_count_key(faculty_id), delta)
+    except ValueError:
+        pass
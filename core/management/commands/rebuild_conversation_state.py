@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.conversations import rebuild_conversation_state
+from core.models import Conversation
+
+
+class Command(BaseCommand):
+    help = 'Backfill the last message and unread counters of conversations from their messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        conversation_ids = list(Conversation.objects.order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        for start in range(0, len(conversation_ids), batch_size):
+            with transaction.atomic():
+                rebuild_conversation_state(conversation_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt state for {len(conversation_ids)} conversations'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.grade_summaries import refresh_grade_summaries
+from core.models import Enrollment
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-enrollment grade summaries from activity records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class-id', type=int, help='Only rebuild the summaries of one class')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        enrollments = Enrollment.objects.all()
+        if options['class_id']:
+            enrollments = enrollments.filter(enrolled_class_id=options['class_id'])
+
+        enrollment_ids = list(enrollments.order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        for start in range(0, len(enrollment_ids), batch_size):
+            with transaction.atomic():
+                refresh_grade_summaries(enrollment_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt grade summaries for {len(enrollment_ids)} enrollments'))
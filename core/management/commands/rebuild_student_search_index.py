@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Student
+from core.student_search import index_students
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the student search tokens from the student records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        student_ids = list(Student.objects.order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        for start in range(0, len(student_ids), batch_size):
+            with transaction.atomic():
+                index_students(Student.objects.filter(id__in=student_ids[start:start + batch_size]))
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search tokens for {len(student_ids)} students'))
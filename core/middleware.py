@@ -0,0 +1,44 @@
+from django.utils.functional import SimpleLazyObject
+
+from core.models import Student, Faculty, AdminUser
+
+# session['role'] -> how to load the logged in user for that role.
+PRINCIPAL_LOOKUPS = {
+    'student': lambda user_id: Student.objects.select_related('profile').filter(student_id=user_id).first(),
+    'faculty': lambda user_id: Faculty.objects.filter(faculty_id=user_id).first(),
+    'admin': lambda user_id: AdminUser.objects.filter(employee_id=user_id).first(),
+}
+
+
+def get_principal(request):
+    """
+    The Student, Faculty or AdminUser logged in on this request, or None.
+    Loaded from ``session['role']`` and ``session['user_id']`` at most once
+    per request.
+    """
+    if not hasattr(request, '_cached_principal'):
+        principal = None
+        user_id = request.session.get('user_id')
+        lookup = PRINCIPAL_LOOKUPS.get(request.session.get('role'))
+        if user_id and lookup:
+            principal = lookup(user_id)
+        request._cached_principal = principal
+    return request._cached_principal
+
+
+def get_principal_for(request, role):
+    """The principal if it is logged in with ``role``, otherwise None."""
+    if request.session.get('role') != role:
+        return None
+    return get_principal(request)
+
+
+class PrincipalMiddleware:
+    """Attach the logged in user as a lazy ``request.principal``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.principal = SimpleLazyObject(lambda: get_principal(request))
+        return self.get_response(request)
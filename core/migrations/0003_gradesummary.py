@@ -0,0 +1,29 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_delete_notification_delete_passwordresettoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity_type', models.CharField(choices=[('Quiz', 'Quiz'), ('Assignment', 'Assignment'), ('Seatwork', 'Seatwork'), ('Laboratory', 'Laboratory'), ('Prelim', 'Prelim'), ('Midterm', 'Midterm'), ('Pre-Final', 'Pre-Final'), ('Final', 'Final')], max_length=20)),
+                ('score_total', models.FloatField(default=0)),
+                ('perfect_score_total', models.FloatField(default=0)),
+                ('percentage_total', models.FloatField(default=0)),
+                ('record_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_summaries', to='core.enrollment')),
+            ],
+            options={
+                'verbose_name_plural': 'Grade summaries',
+                'unique_together': {('enrollment', 'activity_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_gradesummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='class',
+            name='record_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='activityrecord',
+            name='version',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_class_record_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassListImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(blank=True, max_length=255)),
+                ('total_rows', models.IntegerField(default=0)),
+                ('matched_rows', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('class_obj', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='class_list_imports', to='core.class')),
+                ('faculty', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.faculty')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ClassListImportRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.IntegerField()),
+                ('student_id', models.CharField(max_length=20)),
+                ('first_name', models.CharField(blank=True, max_length=100)),
+                ('middle_name', models.CharField(blank=True, max_length=50)),
+                ('last_name', models.CharField(blank=True, max_length=100)),
+                ('course', models.CharField(blank=True, max_length=50)),
+                ('year', models.CharField(blank=True, max_length=50)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='core.classlistimport')),
+                ('matched_student', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.student')),
+            ],
+            options={
+                'ordering': ['row_number'],
+                'indexes': [models.Index(fields=['job', 'row_number'], name='core_classl_job_id_9efadf_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# A frozen copy of the tokenizer in core.student_search as of this
+# migration, so later changes to it do not change what the backfill does.
+TOKEN_MAX_LENGTH = 100
+TOKEN_SPLIT = re.compile(r'[\W_]+')
+
+
+def normalize_tokens(text):
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return [token[:TOKEN_MAX_LENGTH] for token in TOKEN_SPLIT.split(text) if token]
+
+
+def student_tokens(student):
+    tokens = set()
+    for value in (student.first_name, student.middle_name, student.last_name, student.student_id):
+        tokens.update(normalize_tokens(value))
+    tokens.update(normalize_tokens((student.email or '').split('@')[0]))
+    compact_id = ''.join(normalize_tokens(student.student_id))[:TOKEN_MAX_LENGTH]
+    if compact_id:
+        tokens.add(compact_id)
+    return tokens
+
+
+def build_search_tokens(apps, schema_editor):
+    Student = apps.get_model('core', 'Student')
+    StudentSearchToken = apps.get_model('core', 'StudentSearchToken')
+    StudentSearchToken.objects.bulk_create(
+        (
+            StudentSearchToken(student_id=student.pk, token=token)
+            for student in Student.objects.iterator()
+            for token in student_tokens(student)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_classlistimport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=100)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='core.student')),
+            ],
+            options={
+                'unique_together': {('student', 'token')},
+            },
+        ),
+        migrations.RunPython(build_search_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations, models
+
+
+def fill_pair_keys(apps, schema_editor):
+    Conversation = apps.get_model('core', 'Conversation')
+    ConversationParticipant = apps.get_model('core', 'ConversationParticipant')
+
+    participants = {}
+    for conversation_id, student_id in ConversationParticipant.objects.values_list('conversation_id', 'student_id'):
+        participants.setdefault(conversation_id, []).append(student_id)
+
+    taken = set()
+    conversations = []
+    # The oldest conversation of a pair keeps the key; later duplicates stay unkeyed.
+    for conversation in Conversation.objects.order_by('id'):
+        student_ids = participants.get(conversation.id, [])
+        if len(student_ids) != 2:
+            continue
+        pair_key = ':'.join(str(pk) for pk in sorted(student_ids))
+        if pair_key not in taken:
+            taken.add(pair_key)
+            conversation.pair_key = pair_key
+            conversations.append(conversation)
+    Conversation.objects.bulk_update(conversations, ['pair_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_message_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='pair_key',
+            field=models.CharField(blank=True, max_length=41, null=True),
+        ),
+        migrations.RunPython(fill_pair_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='conversation',
+            name='pair_key',
+            field=models.CharField(blank=True, max_length=41, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_conversation_pair_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('metric', models.CharField(choices=[('enrollments', 'Enrollments'), ('attendance', 'Attendance'), ('join_requests', 'Join requests'), ('grades', 'Grade distribution')], max_length=20)),
+                ('dimension', models.CharField(blank=True, max_length=20)),
+                ('value', models.IntegerField(default=0)),
+                ('class_obj', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='analytics_rollups', to='core.class')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', 'date'], name='core_analyt_metric_date_idx')],
+            },
+        ),
+    ]
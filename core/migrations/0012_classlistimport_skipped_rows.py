@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_attendance_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classlistimport',
+            name='skipped_rows',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -1,9 +1,9 @@
-from django.db import models
+from django.db import models, IntegrityError, transaction
 import random, string
 import uuid
 from django.apps import AppConfig
 from django.conf import settings
-from django.db.models import Count
+from django.db.models import Count, F
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -35,6 +35,7 @@ class Class(models.Model):
     room = models.CharField(max_length=50)
     class_code = models.CharField(max_length=10, unique=True, blank=True, null=True)
     is_archived = models.BooleanField(default=False)
+    record_version = models.PositiveIntegerField(default=0)
 
     def save(self, *args, **kwargs):
         if not self.class_code:
@@ -44,6 +45,12 @@ class Class(models.Model):
             self.class_code = new_code
         super().save(*args, **kwargs)
 
+    @classmethod
+    def bump_record_version(cls, class_id):
+        """Take the next class record version, locking the class row until commit."""
+        cls.objects.filter(pk=class_id).update(record_version=F('record_version') + 1)
+        return cls.objects.values_list('record_version', flat=True).get(pk=class_id)
+
     def __str__(self):
         return f"{self.subject_name} ({self.subject_code})"
 
@@ -63,6 +70,17 @@ class Student(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.student_id})"
 
+class StudentSearchToken(models.Model):
+    """Normalized name/id tokens of a student for indexed prefix search, maintained by core.student_search."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=100, db_index=True)
+
+    class Meta:
+        unique_together = ('student', 'token')
+
+    def __str__(self):
+        return f"{self.token} -> {self.student_id}"
+
 class StudentProfile(models.Model):
     student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='profile')
     avatar = models.ImageField(default='default_avatar.jpg', upload_to='student_profiles/')
@@ -131,6 +149,43 @@ class Enrollment(models.Model):
         else:
             return f"Enrollment record for unknown person in {self.enrolled_class}"
 
+class ClassListImport(models.Model):
+    """An uploaded class list, staged row by row until the faculty commits or discards it."""
+    class_obj = models.ForeignKey(Class, on_delete=models.CASCADE, related_name='class_list_imports')
+    faculty = models.ForeignKey(Faculty, on_delete=models.SET_NULL, null=True, blank=True)
+    file_name = models.CharField(max_length=255, blank=True)
+    total_rows = models.IntegerField(default=0)
+    matched_rows = models.IntegerField(default=0)
+    skipped_rows = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def unmatched_rows(self):
+        return self.total_rows - self.matched_rows
+
+    def __str__(self):
+        return f"Class list import {self.id} for {self.class_obj} ({self.total_rows} rows)"
+
+class ClassListImportRow(models.Model):
+    job = models.ForeignKey(ClassListImport, on_delete=models.CASCADE, related_name='rows')
+    row_number = models.IntegerField()
+    student_id = models.CharField(max_length=20)
+    first_name = models.CharField(max_length=100, blank=True)
+    middle_name = models.CharField(max_length=50, blank=True)
+    last_name = models.CharField(max_length=100, blank=True)
+    course = models.CharField(max_length=50, blank=True)
+    year = models.CharField(max_length=50, blank=True)
+    matched_student = models.ForeignKey(Student, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        ordering = ['row_number']
+        indexes = [
+            models.Index(fields=['job', 'row_number']),
+        ]
+
+    def __str__(self):
+        return f"Row {self.row_number}: {self.student_id}"
+
 class ActivityRecord(models.Model):
     enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='activity_records')
     student = models.ForeignKey(Student, on_delete=models.CASCADE, null=True, blank=True, related_name='activity_records')
@@ -152,13 +207,43 @@ class ActivityRecord(models.Model):
     faculty = models.ForeignKey(Faculty, on_delete=models.SET_NULL, null=True, blank=True)
     score = models.FloatField(null=True, blank=True)
     perfect_score = models.FloatField(null=False, blank=False, default=100)
+    version = models.PositiveIntegerField(default=0, db_index=True)
 
     class Meta:
         unique_together = ('enrollment', 'activity_type', 'activity_name')
 
+    def save(self, *args, **kwargs):
+        # Grid saves stamp the version in bulk; every other writer (e.g.
+        # QuizGrade) takes the next class record version here, so the edit
+        # reaches other class record clients as a remote change.
+        with transaction.atomic():
+            self.version = Class.bump_record_version(self.enrollment.enrolled_class_id)
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.enrollment.student} - {self.activity_type} {self.activity_name}: {self.score}/{self.perfect_score}"
 
+class GradeSummary(models.Model):
+    """Running totals of an enrollment's scored activities of one type, kept in sync by core.signals."""
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='grade_summaries')
+    activity_type = models.CharField(max_length=20, choices=ActivityRecord.ACTIVITY_TYPE_CHOICES)
+    score_total = models.FloatField(default=0)
+    perfect_score_total = models.FloatField(default=0)
+    percentage_total = models.FloatField(default=0)
+    record_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('enrollment', 'activity_type')
+        verbose_name_plural = 'Grade summaries'
+
+    @property
+    def average_percentage(self):
+        return self.percentage_total / self.record_count if self.record_count else 0
+
+    def __str__(self):
+        return f"{self.enrollment} - {self.activity_type}: {self.score_total}/{self.perfect_score_total}"
+
 class Notification(models.Model):
     title = models.CharField(max_length=100)
     content = models.TextField()
@@ -176,18 +261,34 @@ class Notification(models.Model):
         app_label = 'notifications'
 
 class Conversation(models.Model):
-    participants = models.ManyToManyField(Student, related_name='conversations')
+    participants = models.ManyToManyField(Student, related_name='conversations', through='ConversationParticipant')
     muted_by = models.ManyToManyField(Student, related_name='muted_conversations', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Kept in step with the messages by core.conversations.
+    last_message_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    last_message_preview = models.CharField(max_length=255, blank=True)
+    last_message_sender = models.ForeignKey(Student, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # "<lower student pk>:<higher student pk>" of a two-party conversation.
+    pair_key = models.CharField(max_length=41, unique=True, null=True, blank=True)
+
+    @staticmethod
+    def make_pair_key(student1, student2):
+        return ':'.join(str(pk) for pk in sorted([student1.pk, student2.pk]))
 
     @classmethod
     def get_or_create_conversation(cls, student1, student2):
-        conversations = cls.objects.filter(participants=student1).filter(participants=student2)
-        if conversations.exists():
-            return conversations.first()
-        conversation = cls.objects.create()
-        conversation.participants.add(student1, student2)
-        return conversation
+        pair_key = cls.make_pair_key(student1, student2)
+        conversation = cls.objects.filter(pair_key=pair_key).first()
+        if conversation:
+            return conversation
+        try:
+            with transaction.atomic():
+                conversation = cls.objects.create(pair_key=pair_key)
+                conversation.participants.add(student1, student2)
+            return conversation
+        except IntegrityError:
+            # Someone else created it first; the unique pair_key makes us lose cleanly.
+            return cls.objects.get(pair_key=pair_key)
 
     def get_other_participant(self, user):
         """Return the other participant in the conversation given the current user."""
@@ -204,6 +305,20 @@ class Conversation(models.Model):
     def __str__(self):
         return f"Conversation ({self.id})"
 
+class ConversationParticipant(models.Model):
+    """A student in a conversation, with their count of unread messages."""
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Reuses the table of the former auto-created participants M2M.
+        db_table = 'core_conversation_participants'
+        unique_together = ('conversation', 'student')
+
+    def __str__(self):
+        return f"{self.student} in {self.conversation} ({self.unread_count} unread)"
+
 class Message(models.Model):
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='messages')
@@ -213,6 +328,10 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Keyset pagination of a conversation's history, see chat_screen.history.
+            models.Index(fields=['conversation', 'timestamp', 'id']),
+        ]
 
     def __str__(self):
         return f"From {self.sender} at {self.timestamp}"
@@ -243,6 +362,10 @@ class Attendance(models.Model):
                 name='unique_student_class_date_attendance'
             )
         ]
+        indexes = [
+            models.Index(fields=['student', 'date'], name='core_attend_student_date_idx'),
+            models.Index(fields=['class_obj', 'date'], name='core_attend_class_date_idx'),
+        ]
 
 # class Activity(models.Model):
 #     TYPE_CHOICES = [('Quiz', 'Quiz'), ('Assignment', 'Assignment'), ('Exam', 'Exam')]
@@ -315,6 +438,26 @@ class Analytics(models.Model):
             print(f"Error updating analytics: {e}")
             return None
 
+class AnalyticsRollup(models.Model):
+    """One daily fact (a count) of an analytics metric, per class where it applies, written by analytics.rollups."""
+    METRIC_CHOICES = [
+        ('enrollments', 'Enrollments'),
+        ('attendance', 'Attendance'),
+        ('join_requests', 'Join requests'),
+        ('grades', 'Grade distribution'),
+    ]
+    date = models.DateField()
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    class_obj = models.ForeignKey(Class, on_delete=models.CASCADE, null=True, blank=True, related_name='analytics_rollups')
+    dimension = models.CharField(max_length=20, blank=True)
+    value = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['metric', 'date'], name='core_analyt_metric_date_idx')]
+
+    def __str__(self):
+        return f"{self.date} {self.metric} {self.dimension}: {self.value}"
+
 class EditAdminConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'edit_admin'
@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core.grade_summaries import refresh_grade_summaries
+from core.join_request_counts import adjust_pending_count
+from core.models import ActivityRecord, Class, ClassJoinRequest, Student
+from core.student_search import index_student, search_cache
+
+
+@receiver(post_init, sender=ActivityRecord)
+def remember_grade_summary_key(sender, instance, **kwargs):
+    # Deferred fields (e.g. .only('id')) are not loaded; treat them as unknown.
+    instance._loaded_summary_key = (instance.__dict__.get('enrollment_id'), instance.__dict__.get('activity_type'))
+
+
+@receiver(post_save, sender=ActivityRecord)
+@receiver(post_delete, sender=ActivityRecord)
+def update_grade_summary(sender, instance, **kwargs):
+    # QuizGrade.save() writes through ActivityRecord, so this covers quiz grades too.
+    # A record moved to another enrollment or activity type leaves its old
+    # summary behind, so that one is refreshed as well.
+    keys = [(instance.enrollment_id, instance.activity_type), instance._loaded_summary_key]
+    enrollment_ids = {enrollment_id for enrollment_id, _ in keys if enrollment_id is not None}
+    activity_types = {activity_type for _, activity_type in keys if activity_type is not None}
+    transaction.on_commit(lambda: refresh_grade_summaries(enrollment_ids, activity_types))
+    instance._loaded_summary_key = (instance.enrollment_id, instance.activity_type)
+
+
+@receiver(post_save, sender=Student)
+def update_student_search_tokens(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_student(instance)
+
+
+@receiver(post_delete, sender=Student)
+def clear_student_search_cache(sender, instance, **kwargs):
+    transaction.on_commit(search_cache.clear)
+
+
+def class_faculty_id(join_request):
+    if ClassJoinRequest.class_requested.is_cached(join_request):
+        return join_request.class_requested.faculty_id
+    return Class.objects.filter(pk=join_request.class_requested_id).values_list('faculty_id', flat=True).first()
+
+
+def schedule_pending_count(join_request, delta):
+    if delta:
+        faculty_id = class_faculty_id(join_request)
+        transaction.on_commit(lambda: adjust_pending_count(faculty_id, delta))
+
+
+@receiver(post_init, sender=ClassJoinRequest)
+def remember_join_request_status(sender, instance, **kwargs):
+    # Deferred status (e.g. .only('id')) is not loaded; treat it as unknown.
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=ClassJoinRequest)
+def count_pending_join_request(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    was_pending = not created and instance._loaded_status == 'pending'
+    schedule_pending_count(instance, (instance.status == 'pending') - was_pending)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=ClassJoinRequest)
+def uncount_pending_join_request(sender, instance, **kwargs):
+    if instance._loaded_status == 'pending':
+        schedule_pending_count(instance, -1)
@@ -0,0 +1,214 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Value, When
+
+from core.models import Student, StudentSearchToken
+
+TOKEN_MAX_LENGTH = StudentSearchToken._meta.get_field('token').max_length
+
+# Every word of a query has to match, so very long queries are cut short.
+MAX_QUERY_TERMS = 4
+
+DEFAULT_LIMIT = 20
+
+TOKEN_SPLIT = re.compile(r'[\W_]+')
+
+# Type-ahead cache: entries hold at most CACHED_RESULTS matches and only
+# complete result sets are reused to answer longer prefixes.
+CACHE_SIZE = 256
+CACHE_TTL = 30
+CACHED_RESULTS = 200
+
+
+def normalize_tokens(text):
+    """Lowercase, accent-stripped alphanumeric words of ``text``."""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return [token[:TOKEN_MAX_LENGTH] for token in TOKEN_SPLIT.split(text) if token]
+
+
+def student_tokens(student):
+    """The searchable tokens of a student: names, student id and e-mail user."""
+    tokens = set()
+    for value in (student.first_name, student.middle_name, student.last_name, student.student_id):
+        tokens.update(normalize_tokens(value))
+    tokens.update(normalize_tokens((student.email or '').split('@')[0]))
+    compact_id = ''.join(normalize_tokens(student.student_id))[:TOKEN_MAX_LENGTH]
+    if compact_id:
+        # Lets "20240001" find student id "2024-0001".
+        tokens.add(compact_id)
+    return tokens
+
+
+def query_terms(query):
+    return list(dict.fromkeys(normalize_tokens(query)))[:MAX_QUERY_TERMS]
+
+
+def index_students(students):
+    """Replace the search tokens of ``students`` in two statements."""
+    students = [student for student in students if student.pk]
+    if not students:
+        return
+    transaction.on_commit(search_cache.clear)
+    StudentSearchToken.objects.filter(student__in=students).delete()
+    StudentSearchToken.objects.bulk_create(
+        [
+            StudentSearchToken(student_id=student.pk, token=token)
+            for student in students
+            for token in student_tokens(student)
+        ],
+        batch_size=1000,
+    )
+
+
+def index_student(student):
+    index_students([student])
+
+
+def find_student_ids(query, limit=DEFAULT_LIMIT, exclude_ids=()):
+    """
+    Ids of the students matching ``query``, best match first, in one query.
+
+    Each word of the query has to prefix-match one of a student's tokens, so
+    "juan cruz" and "cruz juan" both find Juan Dela Cruz. Matches are served
+    by the token index (``LIKE 'term%'``) and ranked by how many words match a
+    token exactly. Tokens and terms are both normalized, so the lookup is
+    ``istartswith``: MySQL compiles ``startswith`` to ``LIKE BINARY``, which
+    cannot use the index of a case-insensitive column.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    any_term = Q()
+    annotations = {}
+    for position, term in enumerate(terms):
+        any_term |= Q(token__istartswith=term)
+        annotations[f'prefix_{position}'] = Max(Case(
+            When(token__istartswith=term, then=Value(1)), default=Value(0), output_field=IntegerField(),
+        ))
+        annotations[f'exact_{position}'] = Max(Case(
+            When(token=term, then=Value(1)), default=Value(0), output_field=IntegerField(),
+        ))
+
+    matches = StudentSearchToken.objects.filter(any_term)
+    if exclude_ids:
+        matches = matches.exclude(student_id__in=exclude_ids)
+    matches = matches.values('student_id').annotate(**annotations)
+    for position in range(len(terms)):
+        matches = matches.filter(**{f'prefix_{position}': 1})
+
+    rank = sum((F(f'exact_{position}') for position in range(1, len(terms))), F('exact_0'))
+    rows = matches.annotate(rank=rank).order_by('-rank', 'student_id')[:limit]
+    return [row['student_id'] for row in rows]
+
+
+def match_terms(terms, tokens):
+    """The rank of a student with ``tokens`` for ``terms``, or None if a term does not match."""
+    if not all(any(token.startswith(term) for token in tokens) for term in terms):
+        return None
+    return sum(1 for term in terms if term in tokens)
+
+
+class SearchCache:
+    """
+    Per-process LRU cache of type-ahead results keyed on the normalized query.
+
+    A miss first looks for a cached complete result set of a shorter prefix
+    of the query ("jua" for "juan"); since every longer prefix can only
+    narrow the matches, it is filtered in memory instead of queried again.
+    """
+
+    def __init__(self, size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set(self, key, matches, complete):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, matches, complete)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def lookup(self, terms):
+        """Cached ``(matches, complete)`` for ``terms``, filtered from a shorter prefix if need be."""
+        key = ' '.join(terms)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        for end in range(len(key) - 1, 0, -1):
+            shorter = self.get(key[:end])
+            if shorter is None or not shorter[1]:
+                continue
+            ranked = []
+            for student, tokens in shorter[0]:
+                rank = match_terms(terms, tokens)
+                if rank is not None:
+                    ranked.append((-rank, student.pk, student, tokens))
+            ranked.sort(key=lambda match: match[:2])
+            matches = [(student, tokens) for _, _, student, tokens in ranked]
+            self.set(key, matches, True)
+            return matches, True
+        return None
+
+    def search(self, terms):
+        """``(student, tokens)`` pairs matching ``terms`` in rank order, at most CACHED_RESULTS."""
+        cached = self.lookup(terms)
+        if cached is not None:
+            return cached[0]
+        student_ids = find_student_ids(' '.join(terms), CACHED_RESULTS)
+        students = Student.objects.in_bulk(student_ids)
+        matches = [
+            (students[student_id], student_tokens(students[student_id]))
+            for student_id in student_ids if student_id in students
+        ]
+        self.set(' '.join(terms), matches, len(student_ids) < CACHED_RESULTS)
+        return matches
+
+
+search_cache = SearchCache()
+
+
+def search_students(query, limit=DEFAULT_LIMIT, exclude_ids=(), queryset=None):
+    """
+    Students matching ``query`` in rank order. ``queryset`` lets callers add
+    ``select_related``/``only`` to the final lookup; without one, results
+    come from the type-ahead cache.
+    """
+    if queryset is None:
+        terms = query_terms(query)
+        if not terms:
+            return []
+        exclude_ids = set(exclude_ids)
+        students = [student for student, _ in search_cache.search(terms) if student.pk not in exclude_ids]
+        return students[:limit]
+
+    student_ids = find_student_ids(query, limit, exclude_ids)
+    if not student_ids:
+        return []
+    students = queryset.in_bulk(student_ids)
+    return [students[student_id] for student_id in student_ids if student_id in students]
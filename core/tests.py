@@ -1,3 +1,231 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import openpyxl
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.attendance_stats import attendance_by_class, attendance_totals
+from core.context_processors import user_context_processor, user_profile_context
+from core.exports import iterate, stream_csv, stream_xlsx
+from core.middleware import get_principal, get_principal_for
+from core.models import Class, Student, Enrollment, ActivityRecord, Attendance, Faculty, FacultyProfile, GradeSummary
+from core.student_search import find_student_ids, search_cache, search_students
+
+
+class GradeSummaryTests(TestCase):
+    def setUp(self):
+        self.class_obj = Class.objects.create(
+            subject_name='Data Structures', subject_code='CS201',
+            description='', schedule='MWF 9-10', room='R101',
+        )
+        self.student = Student.objects.create(
+            student_id='S-0001', first_name='Juan', last_name='Cruz', email='juan@example.com',
+        )
+        self.enrollment = Enrollment.objects.create(student=self.student, enrolled_class=self.class_obj)
+
+    def record(self, name, score, perfect_score=10):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ActivityRecord.objects.create(
+                enrollment=self.enrollment, student=self.student, date=date.today(),
+                activity_type='Quiz', activity_name=name, score=score, perfect_score=perfect_score,
+            )
+
+    def test_summary_follows_activity_record_writes(self):
+        self.record('Quiz 1', 5)
+        quiz_2 = self.record('Quiz 2', 10, 20)
+
+        summary = GradeSummary.objects.get(enrollment=self.enrollment, activity_type='Quiz')
+        self.assertEqual((summary.score_total, summary.perfect_score_total, summary.record_count), (15, 30, 2))
+        self.assertEqual(summary.average_percentage, 50)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            quiz_2.score = 20
+            quiz_2.save()
+        summary.refresh_from_db()
+        self.assertEqual(summary.score_total, 25)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ActivityRecord.objects.filter(enrollment=self.enrollment).delete()
+        self.assertFalse(GradeSummary.objects.exists())
+
+    def test_moving_a_record_refreshes_both_summaries(self):
+        self.record('Quiz 1', 5)
+        moved = self.record('Quiz 2', 10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.activity_type = 'Exam'
+            moved.save()
+
+        summaries = dict(GradeSummary.objects.values_list('activity_type', 'score_total'))
+        self.assertEqual(summaries, {'Quiz': 5, 'Exam': 10})
+
+    def test_rebuild_command_reconciles_summaries(self):
+        self.record('Quiz 1', 5)
+        GradeSummary.objects.update(score_total=0, record_count=0)
+
+        call_command('rebuild_grade_summaries', stdout=StringIO())
+
+        summary = GradeSummary.objects.get()
+        self.assertEqual((summary.score_total, summary.record_count), (5, 1))
+
+
+class StudentSearchTests(TestCase):
+    def setUp(self):
+        self.juan = Student.objects.create(
+            student_id='2024-0001', first_name='Juan', last_name='Dela Cruz', email='juan@example.com',
+        )
+        self.maria = Student.objects.create(
+            student_id='2024-0002', first_name='María', last_name='Cruz', email='maria@example.com',
+        )
+        search_cache.clear()
+
+    def test_every_word_must_prefix_match(self):
+        self.assertEqual(search_students('juan cruz'), [self.juan])
+        self.assertEqual(search_students('cruz juan'), [self.juan])
+        self.assertEqual(search_students('maria'), [self.maria])
+        self.assertEqual(search_students('20240002'), [self.maria])
+        self.assertEqual(search_students('ana'), [])
+
+    def test_exact_matches_rank_first_and_exclude(self):
+        self.assertEqual(search_students('cruz'), [self.juan, self.maria])
+        self.assertEqual(search_students('cruz', exclude_ids=[self.juan.id]), [self.maria])
+
+    def test_prefix_match_is_a_plain_like(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(find_student_ids('cruz jua'), [self.juan.id])
+        sql = queries[0]['sql']
+        self.assertNotIn('BINARY', sql)
+        self.assertIn(" LIKE 'cruz%'", sql)
+        self.assertIn(" LIKE 'jua%'", sql)
+
+    def test_tokens_and_cache_follow_student_saves(self):
+        self.assertEqual(search_students('dela'), [self.juan])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.juan.last_name = 'Santos'
+            self.juan.save()
+        self.assertEqual(search_students('santos'), [self.juan])
+        self.assertEqual(search_students('dela'), [])
+
+    def test_longer_prefixes_are_filtered_from_the_cache(self):
+        self.assertEqual(search_students('cr'), [self.juan, self.maria])
+        with self.assertNumQueries(0):
+            self.assertEqual(search_students('cruz'), [self.juan, self.maria])
+            self.assertEqual(search_students('cruz mar'), [self.maria])
+            self.assertEqual(search_students('cruz', exclude_ids=[self.juan.id]), [self.maria])
+
+
+class PrincipalTests(TestCase):
+    def setUp(self):
+        self.student = Student.objects.create(
+            student_id='2024-0001', first_name='Juan', last_name='Cruz', email='juan@example.com',
+        )
+
+    def request(self, **session):
+        request = RequestFactory().get('/')
+        request.session = session
+        return request
+
+    def test_principal_is_loaded_once_per_request(self):
+        request = self.request(role='student', user_id='2024-0001')
+        with self.assertNumQueries(1):
+            self.assertEqual(get_principal(request), self.student)
+            self.assertEqual(get_principal_for(request, 'student'), self.student)
+            context = user_context_processor(request)
+        self.assertEqual(context['fullname'], 'Juan Cruz')
+        self.assertIsNone(get_principal_for(request, 'faculty'))
+
+    def test_sidebar_profile_reuses_the_principal(self):
+        Faculty.objects.create(
+            faculty_id='F-0001', first_name='Ana', last_name='Reyes', college_name='CCS',
+            department_name='IT', email='ana@example.com',
+        )
+        profile = FacultyProfile.objects.create(
+            faculty_id='F-0001', first_name='Ana', last_name='Reyes', department='IT', email='ana@example.com',
+        )
+        request = self.request(role='faculty', user_id='F-0001')
+        with self.assertNumQueries(0):
+            context = user_profile_context(request)
+        user_context_processor(request)
+        with self.assertNumQueries(1):
+            self.assertEqual(context['sidebar_profile'].pk, profile.pk)
+            self.assertEqual(user_profile_context(request)['sidebar_profile'].pk, profile.pk)
+
+    def test_no_principal_without_a_known_role(self):
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_principal(self.request(user_id='2024-0001')))
+            self.assertIsNone(get_principal(self.request(role='student')))
+
+
+class AttendanceStatsTests(TestCase):
+    def test_per_class_totals_come_from_one_query(self):
+        student = Student.objects.create(student_id='S-0001', first_name='Juan', last_name='Cruz', email='juan@example.com')
+        classes = [
+            Class.objects.create(subject_name=name, subject_code=code, description='', schedule='MWF', room='R101')
+            for name, code in [('Physics', 'PHY1'), ('Algebra', 'MTH1')]
+        ]
+        statuses = {classes[0]: ['Present', 'Absent', 'Late'], classes[1]: ['Present', 'Present']}
+        for class_obj, class_statuses in statuses.items():
+            for day, status in enumerate(class_statuses):
+                Attendance.objects.create(student=student, class_obj=class_obj, date=date(2025, 1, 1) + timedelta(days=day), status=status)
+
+        with self.assertNumQueries(1):
+            stats = attendance_by_class(student)
+            labels = [str(stat['class']) for stat in stats.values()]
+
+        self.assertEqual(labels, ['Algebra (MTH1)', 'Physics (PHY1)'])
+        self.assertEqual(
+            {key: stats[classes[0].id][key] for key in ('total', 'present', 'absent', 'late')},
+            {'total': 3, 'present': 1, 'absent': 1, 'late': 1},
+        )
+        self.assertEqual(attendance_totals(stats), {'total': 5, 'present': 3, 'absent': 1, 'late': 1, 'rate': 60.0})
+        self.assertEqual(list(attendance_by_class(student, classes[1])), [classes[1].id])
+
+
+class ExportTests(TestCase):
+    def test_querysets_are_read_in_keyset_chunks_in_display_order(self):
+        student = Student.objects.create(student_id='S-0001', first_name='Juan', last_name='Cruz', email='juan@example.com')
+        classes = [
+            Class.objects.create(subject_name=f'Subject {i}', subject_code=f'S{i}', description='', schedule='MWF', room='R101')
+            for i in range(3)
+        ]
+        for day in range(3):
+            for class_obj in classes:
+                Attendance.objects.create(student=student, class_obj=class_obj, date=date(2025, 1, 1) + timedelta(days=day), status='Present')
+        records = Attendance.objects.filter(student=student)
+
+        with mock.patch('core.exports.EXPORT_CHUNK_SIZE', 2), self.assertNumQueries(5):
+            exported = list(iterate(records, ('-date', 'id')))
+        self.assertEqual(exported, list(records.order_by('-date', 'id')))
+
+    def test_csv_is_written_while_streaming(self):
+        consumed = []
+
+        def rows():
+            for i in range(3):
+                consumed.append(i)
+                yield [f'row {i}', i]
+
+        response = stream_csv('report.csv', ['Name', 'Value'], rows())
+        self.assertTrue(response.streaming)
+        self.assertEqual(consumed, [])
+        self.assertEqual(b''.join(response.streaming_content).decode(), 'Name,Value\r\nrow 0,0\r\nrow 1,1\r\nrow 2,2\r\n')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="report.csv"')
+
+    def test_xlsx_sheets_are_streamed_from_a_write_only_workbook(self):
+        response = stream_xlsx('report.xlsx', [
+            ('Records', ['Date', 'Status'], (['2025-06-02', status] for status in ['Present', 'Late'])),
+            ('Summary', ['Total'], [[2]]),
+        ])
+        self.assertTrue(response.streaming)
+
+        workbook = openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(workbook.sheetnames, ['Records', 'Summary'])
+        self.assertEqual(
+            list(workbook['Records'].iter_rows(values_only=True)),
+            [('Date', 'Status'), ('2025-06-02', 'Present'), ('2025-06-02', 'Late')],
+        )
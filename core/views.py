@@ -3,7 +3,7 @@ from core.models import Student, Faculty, AdminUser
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse, HttpResponse
 from .models import SeatworkRecord
-import csv
+from .exports import iterate, stream_csv
 from django.views.decorators.csrf import csrf_exempt
 import json
 
@@ -127,15 +127,9 @@ def api_records(request):
         return JsonResponse({'deleted': True})
 
 def export_csv(request):
-    records = SeatworkRecord.objects.all().order_by('-date')
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="student_seatwork_records.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Name', 'Activity', 'Score', 'Status', 'Date'])
-    
-    for record in records:
-        writer.writerow([record.name, record.activity, record.score, record.status, record.date])
-    
-    return response
\ No newline at end of file
+    records = SeatworkRecord.objects.all()
+    rows = (
+        [record.name, record.activity, record.score, record.status, record.date]
+        for record in iterate(records, ('-date', '-id'))
+    )
+    return stream_csv('student_seatwork_records.csv', ['Name', 'Activity', 'Score', 'Status', 'Date'], rows)
\ No newline at end of file
@@ -0,0 +1,44 @@
+from django.db.models import Count
+
+from core.db_utils import upsert_kwargs
+from core.models import Attendance, Enrollment
+
+STATUSES = {status for status, _ in Attendance.STATUS_CHOICES}
+
+
+class InvalidRollCall(ValueError):
+    pass
+
+
+def take_roll_call(class_obj, day, statuses):
+    """
+    Record the attendance of ``class_obj`` on ``day`` from ``statuses``
+    ({student pk: status}) in a single upsert on the (student, class, date)
+    unique constraint; a student marked twice the same day keeps the latest
+    status. Every student must be enrolled in the class.
+
+    Returns the class's totals for the day by status.
+    """
+    invalid = {status for status in statuses.values() if status not in STATUSES}
+    if invalid:
+        raise InvalidRollCall(f"Unknown status {', '.join(sorted(map(str, invalid)))}")
+    enrolled = set(Enrollment.objects.filter(
+        enrolled_class=class_obj, student_id__in=statuses,
+    ).values_list('student_id', flat=True))
+    strangers = set(statuses) - enrolled
+    if strangers:
+        raise InvalidRollCall(f"Students {', '.join(map(str, sorted(strangers)))} are not enrolled in this class")
+
+    Attendance.objects.bulk_create(
+        [
+            Attendance(student_id=student_id, class_obj=class_obj, date=day, status=status)
+            for student_id, status in statuses.items()
+        ],
+        **upsert_kwargs(Attendance, ['student', 'class_obj', 'date'], ['status']),
+    )
+
+    totals = dict.fromkeys(sorted(STATUSES), 0)
+    totals.update(Attendance.objects.filter(class_obj=class_obj, date=day).values_list('status').annotate(
+        count=Count('id'),
+    ).order_by())
+    return totals
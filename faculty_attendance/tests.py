@@ -1,3 +1,56 @@
+import json
+from datetime import date
+
 from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Attendance, Class, Enrollment, Faculty, Student
+from faculty_attendance.roll_call import take_roll_call
+
+
+class RollCallTests(TestCase):
+    def setUp(self):
+        self.faculty = Faculty.objects.create(
+            faculty_id='F-001', first_name='Maria', last_name='Santos',
+            college_name='CCS', department_name='IT', email='maria@example.com',
+        )
+        self.class_obj = Class.objects.create(
+            faculty=self.faculty, subject_name='Algebra', subject_code='MTH1', description='', schedule='MWF', room='101',
+        )
+        self.students = Student.objects.bulk_create([
+            Student(student_id=f'2024-{i:04d}', first_name='First', last_name=f'Last{i}', email=f's{i}@example.com')
+            for i in range(60)
+        ])
+        Enrollment.objects.bulk_create([Enrollment(student=student, enrolled_class=self.class_obj) for student in self.students])
+        self.day = date(2025, 6, 2)
+
+    def test_a_section_is_written_in_one_statement_and_can_be_corrected(self):
+        statuses = {student.pk: 'Present' for student in self.students}
+        statuses[self.students[0].pk] = 'Absent'
+
+        # Enrollment check, the upsert and the totals.
+        with self.assertNumQueries(3):
+            totals = take_roll_call(self.class_obj, self.day, statuses)
+        self.assertEqual(totals, {'Absent': 1, 'Late': 0, 'Present': 59})
+
+        totals = take_roll_call(self.class_obj, self.day, {self.students[0].pk: 'Late'})
+        self.assertEqual(totals, {'Absent': 0, 'Late': 1, 'Present': 59})
+        self.assertEqual(Attendance.objects.count(), 60)
+
+    def test_endpoint_checks_the_class_and_the_roster(self):
+        session = self.client.session
+        session['role'] = 'faculty'
+        session['user_id'] = self.faculty.faculty_id
+        session.save()
+        stranger = Student.objects.create(student_id='2024-9999', first_name='New', last_name='Comer', email='new@example.com')
+
+        def post(statuses, class_id=self.class_obj.id):
+            body = {'class_id': class_id, 'date': self.day.isoformat(), 'statuses': statuses}
+            return self.client.post(reverse('faculty_roll_call'), json.dumps(body), content_type='application/json')
 
-# Create your tests here.
+        response = post([{'student': self.students[1].pk, 'status': 'Present'}])
+        self.assertEqual(response.json()['totals'], {'Absent': 0, 'Late': 0, 'Present': 1})
+        self.assertEqual(post([{'student': stranger.pk, 'status': 'Present'}]).status_code, 400)
+        self.assertEqual(post([{'student': self.students[1].pk, 'status': 'Sleeping'}]).status_code, 400)
+        self.assertEqual(post([], class_id=self.class_obj.id + 1).status_code, 404)
+        self.assertEqual(Attendance.objects.count(), 1)
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import faculty_attendance_view
+from .views import faculty_attendance_view, roll_call_view
 
 urlpatterns = [
     path('', faculty_attendance_view, name='faculty_attendance'),
+    path('roll-call/', roll_call_view, name='faculty_roll_call'),
 ]
\ No newline at end of file
@@ -1,8 +1,13 @@
 from django.shortcuts import render
-from django.http import HttpResponse
-from core.models import Faculty_Attendance
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from core.exports import iterate, stream_xlsx
+from core.middleware import get_principal_for
+from core.models import Class, Faculty_Attendance
 import datetime
-import openpyxl
+import json
+
+from faculty_attendance.roll_call import InvalidRollCall, take_roll_call
 
 def faculty_attendance_view(request):
     subject = request.GET.get('subject')
@@ -21,32 +26,13 @@ def faculty_attendance_view(request):
             pass  # Ignore invalid date format
 
     if 'download' in request.GET:
-        # Create an Excel workbook
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = "Attendance Records"
-
-        # Header row
-        sheet.append(['ID Number', 'First Name', 'Last Name', 'Subject', 'Date', 'Status'])
-
-        # Data rows
-        for record in records:
-            sheet.append([
-                record.id_number,
-                record.first_name,
-                record.last_name,
-                record.subject,
-                record.date.strftime('%d-%m-%Y'),
-                record.status
-            ])
-
-        # Prepare HTTP response with Excel file
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        rows = (
+            [record.id_number, record.first_name, record.last_name, record.subject, record.date.strftime('%d-%m-%Y'), record.status]
+            for record in iterate(records, ('date', 'id'))
         )
-        response['Content-Disposition'] = 'attachment; filename=attendance_report.xlsx'
-        workbook.save(response)
-        return response
+        return stream_xlsx('attendance_report.xlsx', [
+            ('Attendance Records', ['ID Number', 'First Name', 'Last Name', 'Subject', 'Date', 'Status'], rows),
+        ])
 
     # Render the HTML template with filtered records
     return render(request, 'faculty_attendance/faculty_attendance.html', {
@@ -55,3 +41,31 @@ def faculty_attendance_view(request):
         'selected_date': date_filter_str or '',
         'role': 'faculty',
     })
+
+
+@require_POST
+def roll_call_view(request):
+    """
+    Take the attendance of a whole class at once. Expects JSON
+    ``{"class_id", "date": "YYYY-MM-DD", "statuses": [{"student", "status"}]}``
+    where ``student`` is the student's pk, and returns the day's totals by status.
+    """
+    faculty = get_principal_for(request, 'faculty')
+    if not faculty:
+        return JsonResponse({'error': 'Faculty authentication required'}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        day = datetime.date.fromisoformat(data['date'])
+        statuses = {int(entry['student']): entry['status'] for entry in data['statuses']}
+        class_obj = Class.objects.filter(id=int(data['class_id']), faculty=faculty).first()
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected class_id, date and a list of student statuses'}, status=400)
+    if class_obj is None:
+        return JsonResponse({'error': 'Class not found'}, status=404)
+
+    try:
+        totals = take_roll_call(class_obj, day, statuses)
+    except InvalidRollCall as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'class_id': class_obj.id, 'date': day.isoformat(), 'recorded': len(statuses), 'totals': totals})
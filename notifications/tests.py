@@ -1,3 +1,39 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.models import Notification
+
+
+class NotificationsSinceTests(TestCase):
+    def setUp(self):
+        self.first = Notification.objects.create(title='First', content='first')
+        self.second = Notification.objects.create(title='Second', content='second')
+
+    def log_in(self, role, user_id):
+        session = self.client.session
+        session['role'] = role
+        session['user_id'] = user_id
+        session.save()
+
+    def test_returns_only_newer_notifications(self):
+        self.log_in('student', '2024-0001')
+        data = self.client.get(reverse('notifications_since'), {'after': self.first.id}).json()
+        self.assertEqual([notification['title'] for notification in data['notifications']], ['Second'])
+        self.assertEqual(data['after'], self.second.id)
+
+    def test_requires_a_session(self):
+        response = self.client.get(reverse('notifications_since'), {'after': self.first.id})
+        self.assertEqual(response.status_code, 401)
+
+    def test_dashboards_long_poll_from_the_latest_notification(self):
+        dashboards = [
+            ('student', reverse('notifications')),
+            ('faculty', reverse('faculty_notifications')),
+            ('admin', reverse('admin_notif:admin_notif')),
+        ]
+        for role, url in dashboards:
+            with self.subTest(role=role):
+                self.log_in(role, 'X-0001')
+                response = self.client.get(url)
+                self.assertEqual(response.context['latest_notification_id'], self.second.id)
+                self.assertContains(response, f'data-since-url="{reverse("notifications_since")}"')
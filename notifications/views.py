@@ -1,7 +1,13 @@
+from django.db.models import Max
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.decorators.http import require_POST
+from chat_screen.broker import long_poll
+from chat_screen.realtime import NOTIFICATION_CHANNEL
 from core.models import Notification
 
+NOTIFICATION_PAGE_SIZE = 50
+
 def notifications_dashboard(request):
     unread = Notification.objects.filter(is_read=False).order_by('-created_at')
     read = Notification.objects.filter(is_read=True).order_by('-created_at')
@@ -10,6 +16,8 @@ def notifications_dashboard(request):
         'role': 'student',
         'new_notifications': unread,
         'old_notifications': read,
+        # Where the page's long poll for newer notifications starts from.
+        'latest_notification_id': Notification.objects.aggregate(latest=Max('id'))['latest'],
     })
 
 
@@ -21,4 +29,35 @@ def mark_as_read(request, pk):
 @require_POST
 def mark_all_as_read(request):
     Notification.objects.filter(is_read=False).update(is_read=True)
-    return redirect('notifications')
\ No newline at end of file
+    return redirect('notifications')
+
+async def notifications_since(request):
+    """
+    Long poll for notifications newer than the ``after`` id. Answers as soon
+    as there are any, or with an empty list after the long poll timeout.
+    """
+    if not await request.session.aget('user_id'):
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    async def fetch():
+        new_notifications = Notification.objects.filter(id__gt=after).order_by('id')[:NOTIFICATION_PAGE_SIZE]
+        return [notification async for notification in new_notifications]
+
+    notifications = await long_poll(fetch, NOTIFICATION_CHANNEL)
+    return JsonResponse({
+        'notifications': [
+            {
+                'id': notification.id,
+                'title': notification.title,
+                'content': notification.content,
+                'created_at': notification.created_at.isoformat(),
+                'is_read': notification.is_read,
+            }
+            for notification in notifications
+        ],
+        'after': notifications[-1].id if notifications else after,
+    })
@@ -1,3 +1,4 @@
+from django.db.models import Max
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
@@ -9,6 +10,8 @@ def faculty_notifications_dashboard(request):
     return render(request, 'notifications_faculty/faculty_notifications.html', {
         'role': 'faculty',
         'notifications': notifications,
+        # Where the page's long poll for newer notifications starts from.
+        'latest_notification_id': Notification.objects.aggregate(latest=Max('id'))['latest'],
     })
 
 def mark_as_read(request, pk):
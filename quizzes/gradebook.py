@@ -0,0 +1,61 @@
+from django.db.models import Count, Sum
+
+from core.models import Quiz, QuizGrade
+
+
+def get_class_quizzes(classes):
+    """The quizzes of ``classes``, by subject then title, with their question counts."""
+    return list(Quiz.objects.filter(class_obj__in=classes).annotate(
+        question_count=Count('questions'),
+    ).order_by('class_obj__subject_name', 'title', 'id'))
+
+
+def get_gradebook_rows(classes, quizzes):
+    """
+    One row per student with grades in each of ``classes``:
+    ``{'student', 'class_obj', 'quiz_scores', 'average'}``, where
+    ``quiz_scores`` maps quiz ids to the grade cell and ``average`` is the
+    student's total score over total max score in that class, in percent.
+
+    Two queries whatever the number of grades: one grouped aggregation for
+    the per-student totals and one for the individual cells.
+    """
+    classes_by_id = {class_obj.id: class_obj for class_obj in classes}
+    class_of_quiz = {quiz.id: quiz.class_obj_id for quiz in quizzes}
+    grades = QuizGrade.objects.filter(quiz__class_obj__in=classes)
+
+    totals = grades.values('student_id', 'quiz__class_obj_id').annotate(
+        total_score=Sum('score'),
+        total_max=Sum('max_score'),
+    ).order_by()
+
+    rows = {}
+    cells = grades.select_related('student').only(
+        'id', 'quiz_id', 'score', 'max_score', 'percentage',
+        'student__id', 'student__student_id', 'student__first_name', 'student__last_name',
+    )
+    for grade in cells:
+        row = rows.setdefault((grade.student_id, class_of_quiz[grade.quiz_id]), {
+            'student': grade.student,
+            'quiz_scores': {},
+        })
+        row['quiz_scores'][grade.quiz_id] = {
+            'score': grade.score,
+            'max_score': grade.max_score,
+            'grade_id': grade.id,
+            'percentage': grade.percentage,
+        }
+
+    gradebook = []
+    for total in totals:
+        key = (total['student_id'], total['quiz__class_obj_id'])
+        if key not in rows:
+            continue  # graded between the two queries
+        average = (total['total_score'] / total['total_max'] * 100) if total['total_max'] else 0
+        gradebook.append(dict(rows[key], class_obj=classes_by_id[key[1]], average=round(average, 2)))
+
+    order = {class_id: position for position, class_id in enumerate(classes_by_id)}
+    gradebook.sort(key=lambda row: (
+        order[row['class_obj'].id], row['student'].last_name, row['student'].first_name, row['student'].id,
+    ))
+    return gradebook
@@ -1,3 +1,66 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.models import Class, Faculty, Quiz, QuizAttempt, QuizGrade, Student
+from quizzes.gradebook import get_class_quizzes, get_gradebook_rows
+
+
+class GradebookTests(TestCase):
+    def setUp(self):
+        self.faculty = Faculty.objects.create(
+            faculty_id='F-001', first_name='Maria', last_name='Santos',
+            college_name='CCS', department_name='IT', email='maria@example.com',
+        )
+        self.students = [
+            Student.objects.create(
+                student_id=f'2024-{i:04d}', first_name=f'First{i}', last_name=f'Last{i}', email=f'student{i}@example.com',
+            )
+            for i in range(3)
+        ]
+
+    def add_class(self, name, quizzes):
+        class_obj = Class.objects.create(
+            faculty=self.faculty, subject_name=name, subject_code=name.upper(), description='', schedule='MWF', room='101',
+        )
+        return class_obj, [
+            Quiz.objects.create(title=f'Quiz {i}', class_obj=class_obj, faculty=self.faculty, total_points=10)
+            for i in range(1, quizzes + 1)
+        ]
+
+    def grade(self, student, quiz, score):
+        attempt = QuizAttempt.objects.create(student=student, quiz=quiz, score=score, max_score=10, is_completed=True)
+        return QuizGrade.objects.create(student=student, quiz=quiz, attempt=attempt, score=score, max_score=10, percentage=0)
+
+    def test_rows_are_built_from_one_aggregation_and_one_cell_query(self):
+        algebra, (quiz1, quiz2) = self.add_class('Algebra', 2)
+        biology, (bio_quiz,) = self.add_class('Biology', 1)
+        self.grade(self.students[1], quiz1, 10)
+        self.grade(self.students[1], quiz2, 5)
+        self.grade(self.students[0], quiz1, 8)
+        self.grade(self.students[1], bio_quiz, 3)
+        classes = [algebra, biology]
+        quizzes = get_class_quizzes(classes)
+
+        with self.assertNumQueries(2):
+            rows = get_gradebook_rows(classes, quizzes)
+
+        self.assertEqual(
+            [(row['class_obj'], row['student'], row['average']) for row in rows],
+            [(algebra, self.students[0], 80.0), (algebra, self.students[1], 75.0), (biology, self.students[1], 30.0)],
+        )
+        # Same quiz titles in different classes stay apart.
+        self.assertEqual(set(rows[1]['quiz_scores']), {quiz1.id, quiz2.id})
+        self.assertEqual(rows[2]['quiz_scores'][bio_quiz.id]['score'], 3)
+
+    def test_view_pages_through_classes(self):
+        for i in range(12):
+            class_obj, (quiz,) = self.add_class(f'Subject {i:02d}', 1)
+            self.grade(self.students[i % 3], quiz, 7)
+
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('quizzes'))
+        self.assertEqual(len(response.context['student_quiz_data']), 10)
+        self.assertContains(response, 'Page 1 of 2')
+
+        response = self.client.get(reverse('quizzes'), {'page': 2})
+        self.assertEqual([row['class_obj'].subject_name for row in response.context['student_quiz_data']], ['Subject 10', 'Subject 11'])
@@ -1,3 +1,4 @@
+from django.core.paginator import Paginator
 from django.shortcuts import render, get_object_or_404
 from django.db.models import Avg, Count, Q, Max, Min
 from django.http import JsonResponse
@@ -8,28 +9,25 @@ from django.db import transaction
 from core.models import QuizGrade, Class, Student, Quiz, QuizAttempt, ActivityRecord
 import json
 
+from quizzes.gradebook import get_class_quizzes, get_gradebook_rows
+
+CLASS_PAGE_SIZE = 10
+
 def quizzes_view(request):
-    """Open quizzes view without faculty restrictions"""
+    """Open quizzes view without faculty restrictions, a page of classes at a time"""
     # Get all classes with quizzes (not limited to faculty)
     classes_with_quizzes = Class.objects.filter(
         quizzes__isnull=False
     ).annotate(
-        quiz_count=Count('quizzes'),
+        quiz_count=Count('quizzes', distinct=True),
         student_count=Count('students', distinct=True)
-    ).order_by('subject_name')
-    
-    # Get all quizzes for these classes
-    all_quizzes = Quiz.objects.filter(
-        class_obj__in=classes_with_quizzes
-    ).annotate(
-        question_count=Count('questions')
-    ).order_by('class_obj__subject_name', 'title')
+    ).order_by('subject_name', 'id')
+    class_page = Paginator(classes_with_quizzes, CLASS_PAGE_SIZE).get_page(request.GET.get('page'))
+    page_classes = list(class_page)
     
-    # Get all students (not limited to enrolled)
-    students = Student.objects.prefetch_related(
-        'quiz_grades',
-        'quiz_grades__quiz'
-    ).distinct()
+    # Get the quizzes and grades of the classes on this page
+    all_quizzes = get_class_quizzes(page_classes)
+    student_quiz_data = get_gradebook_rows(page_classes, all_quizzes)
     
     # Calculate statistics without faculty filter
     stats = QuizGrade.objects.aggregate(
@@ -42,45 +40,12 @@ def quizzes_view(request):
     
     passing_rate = (stats['passing_count'] / stats['total_count'] * 100) if stats['total_count'] > 0 else 0
     
-    # Prepare student data
-    student_quiz_data = []
-    for class_obj in classes_with_quizzes:
-        class_grades = QuizGrade.objects.filter(
-            quiz__class_obj=class_obj
-        ).select_related('student', 'quiz')
-        
-        grades_by_student = {}
-        for grade in class_grades:
-            if grade.student.id not in grades_by_student:
-                grades_by_student[grade.student.id] = {
-                    'student': grade.student,
-                    'quiz_scores': {},
-                    'total_score': 0,
-                    'total_max': 0
-                }
-            grades_by_student[grade.student.id]['quiz_scores'][grade.quiz.title] = {
-                'score': grade.score,
-                'max_score': grade.max_score,
-                'grade_id': grade.id,
-                'percentage': grade.percentage
-            }
-            grades_by_student[grade.student.id]['total_score'] += grade.score
-            grades_by_student[grade.student.id]['total_max'] += grade.max_score
-        
-        for student_data in grades_by_student.values():
-            average = (student_data['total_score'] / student_data['total_max'] * 100) if student_data['total_max'] > 0 else 0
-            student_quiz_data.append({
-                'student': student_data['student'],
-                'class_obj': class_obj,
-                'quiz_scores': student_data['quiz_scores'],
-                'average': round(average, 2)
-            })
-    
     context = {
         'student_quiz_data': student_quiz_data,
-        'classes_with_quizzes': classes_with_quizzes,
+        'classes_with_quizzes': page_classes,
+        'class_page': class_page,
         'all_quizzes': all_quizzes,
-        'total_students': students.count(),
+        'total_students': Student.objects.count(),
         'class_average': round(stats['avg_score'] or 0, 2),
         'highest_score': round(stats['max_score'] or 0, 2),
         'lowest_score': round(stats['min_score'] or 0, 2),
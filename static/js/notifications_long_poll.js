@@ -0,0 +1,47 @@
+// notifications_long_poll.js
+// Long polls the notifications_since endpoint for notifications created after
+// the page was rendered and prepends them to the page's list, instead of
+// reloading the page. Include it after the markup below:
+//
+// <div id="notificationsLongPoll"
+//      data-since-url="{% url 'notifications_since' %}"
+//      data-after="{{ latest_notification_id|default:0 }}"
+//      data-list="<id of the list new notifications go into>">...</div>
+// <template id="notificationTemplate">
+//   one notification item with .notification-title, .notification-time and
+//   .notification-content elements; elements with data-pk get the notification id
+// </template>
+// <script src="{% static 'js/notifications_long_poll.js' %}"></script>
+
+(function () {
+    const config = document.getElementById('notificationsLongPoll');
+    if (!config) return;
+    const list = document.getElementById(config.dataset.list);
+    const template = document.getElementById('notificationTemplate');
+    let after = config.dataset.after;
+
+    function render(notification) {
+        const item = template.content.firstElementChild.cloneNode(true);
+        item.dataset.id = notification.id;
+        item.querySelector('.notification-title').textContent = notification.title;
+        item.querySelector('.notification-time').textContent = 'just now';
+        item.querySelector('.notification-content').textContent = notification.content;
+        item.querySelectorAll('[data-pk]').forEach(element => { element.dataset.pk = notification.id; });
+        return item;
+    }
+
+    function poll() {
+        fetch(`${config.dataset.sinceUrl}?after=${after}`)
+            .then(response => response.json())
+            .then(data => {
+                data.notifications.forEach(notification => list.prepend(render(notification)));
+                // The section may start hidden when there was nothing to show.
+                if (data.notifications.length) config.classList.remove('hidden');
+                after = data.after;
+                poll();
+            })
+            .catch(() => setTimeout(poll, 5000));
+    }
+
+    poll();
+})();
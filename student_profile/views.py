@@ -1,8 +1,8 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from core.models import Student, StudentProfile
+from core.student_search import search_students
 from .forms import StudentProfileForm, StudentStatusForm
-from django.db.models import Q
 
 def student_profile_view(request):
     """
@@ -92,11 +92,7 @@ def search_student_profiles(request):
     query = request.GET.get('q')
     students = []
     if query:
-        students = Student.objects.filter(
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(student_id__icontains=query)
-        ).select_related('profile')
+        students = search_students(query, limit=50, queryset=Student.objects.select_related('profile'))
 
     context = {
         'students': students,